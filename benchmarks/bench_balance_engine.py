@@ -0,0 +1,119 @@
+"""Compare the NumPy keyring engine with the original per-key loop.
+
+python -m benchmarks.bench_balance_engine --keys 10000
+"""
+
+import argparse
+import random
+import time
+
+from generate.balance_engine import (
+    balance_columns,
+    build_key_dict,
+    compute_key_dict,
+    raw_columns_from_totals,
+)
+from generate.stake_totals import build_stake_totals
+
+
+def synthetic_maps(keys, chain_keys, seed=0):
+    rng = random.Random(seed)
+    addresses = [f"5{i:047d}" for i in range(chain_keys)]
+    balances = {
+        address: {"data": {"free": rng.randint(0, 10**16)}}
+        for address in addresses
+        if rng.random() < 0.9
+    }
+    staketo = {
+        address: [
+            [rng.choice(addresses), rng.randint(0, 10**15)]
+            for _ in range(rng.randint(0, 8))
+        ]
+        for address in addresses
+        if rng.random() < 0.5
+    }
+    stakefrom = {
+        address: [
+            [rng.choice(addresses), rng.randint(0, 10**15)]
+            for _ in range(rng.randint(0, 30))
+        ]
+        for address in addresses
+        if rng.random() < 0.2
+    }
+    key_data = {
+        address: {"key": address, "name": f"key_{i}"}
+        for i, address in enumerate(rng.sample(addresses, keys))
+    }
+    return key_data, balances, staketo, stakefrom
+
+
+def loop_key_dict(key_data, balances, staketo_map, stakefrom_map):
+    """The original get_balances() arithmetic, without the printing."""
+    key_dict = {}
+    for ss58key, value in key_data.items():
+        balance = staketo = stakefrom = 0
+        if ss58key in balances:
+            balance = round(balances[ss58key]["data"]["free"] / 1_000_000_000, 2) or 0
+        if ss58key in staketo_map:
+            raw = sum(stake[1] for stake in staketo_map[ss58key])
+            staketo = round(raw / 1_000_000_000, 2) or 0
+        if ss58key in stakefrom_map:
+            raw = sum(stake[1] for stake in stakefrom_map[ss58key])
+            stakefrom = round(raw / 1_000_000_000, 2) or 0
+        total = round(balance + staketo, 2) or 0
+        key_dict[ss58key] = {
+            "key": ss58key,
+            "name": value["name"],
+            "balance": balance,
+            "stake": staketo,
+            "total": total,
+            "stake_from": stakefrom,
+        }
+    return key_dict
+
+
+def totals_key_dict(key_data, balances, stake_totals):
+    raw_columns = raw_columns_from_totals(list(key_data), balances, stake_totals)
+    return build_key_dict(key_data, balance_columns(raw_columns))
+
+
+def best_of(repeats, func, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--chain-keys", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    maps = synthetic_maps(args.keys, args.chain_keys)
+    loop_time, expected = best_of(args.repeats, loop_key_dict, *maps)
+    engine_time, result = best_of(args.repeats, compute_key_dict, *maps)
+    mismatches = [key for key in expected if expected[key] != result[key]]
+    key_data, balances, staketo, stakefrom = maps
+    stake_totals = build_stake_totals(staketo, stakefrom)
+    totals_time, result = best_of(
+        args.repeats, totals_key_dict, key_data, balances, stake_totals
+    )
+    mismatches += [key for key in expected if expected[key] != result[key]]
+
+    print(
+        f"{args.keys} keys over a {args.chain_keys} key chain, best of {args.repeats}"
+    )
+    print(f"per-key loop   {loop_time * 1000:8.1f} ms")
+    print(f"numpy engine   {engine_time * 1000:8.1f} ms")
+    print(f"stake totals   {totals_time * 1000:8.1f} ms")
+    print(f"speedup        {loop_time / engine_time:8.1f}x")
+    print(f"  with totals  {loop_time / totals_time:8.1f}x")
+    print(f"mismatches     {len(mismatches):8d}")
+
+
+if __name__ == "__main__":
+    main()
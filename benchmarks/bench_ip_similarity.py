@@ -0,0 +1,110 @@
+"""Compare the packed prefix index with the original string-prefix scoring,
+and a full rescore with an incremental update of a few moved UIDs.
+
+python -m benchmarks.bench_ip_similarity --miners 10000 100000
+"""
+
+import argparse
+import random
+import time
+
+from validation.incremental_ip_scorer import IncrementalIPScorer
+from validation.ip_prefix_index import penalize_addresses
+
+
+def synthetic_addresses(miners, seed=0):
+    """Miner addresses where about a third crowd into a few hundred /24s."""
+    rng = random.Random(seed)
+    crowded = [
+        f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}"
+        for _ in range(300)
+    ]
+    addresses = {}
+    for uid in range(miners):
+        roll = rng.random()
+        if roll < 0.05:
+            addresses[str(uid)] = "None:None"
+        elif roll < 0.35:
+            ip = f"{rng.choice(crowded)}.{rng.randint(1, 8)}"
+            addresses[str(uid)] = f"{ip}:{rng.randint(1024, 65535)}"
+        else:
+            ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+            addresses[str(uid)] = f"{ip}:{rng.randint(1024, 65535)}"
+    return addresses
+
+
+def string_prefix_scores(miner_addresses):
+    """The original process_addresses/calculate_score passes, without printing."""
+    unique_ips = {}
+    for value in miner_addresses.values():
+        if value != "None:None" and not value.startswith("localhost"):
+            ip, _ = value.split(":")
+            ip_parts = ip.split(".")
+            for i in range(1, len(ip_parts) + 1):
+                unique_ips.setdefault(".".join(ip_parts[:i]), set()).add(ip)
+    scores = {}
+    for miner_id, address in miner_addresses.items():
+        if address != "None:None" and not address.startswith("localhost"):
+            ip, _ = address.split(":")
+            parts = ip.split(".")
+            score = 0
+            for i in range(3, len(parts) + 1):
+                if ".".join(parts[:i]) in unique_ips:
+                    score += 1 if i == 3 else 3
+            scores[miner_id] = (score, address)
+    return scores
+
+
+def best_of(repeats, func, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--miners", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--moved", type=int, default=10)
+    args = parser.parse_args()
+
+    for miners in args.miners:
+        addresses = synthetic_addresses(miners)
+        string_time, expected = best_of(args.repeats, string_prefix_scores, addresses)
+        index_time, scores = best_of(args.repeats, penalize_addresses, addresses)
+        penalized = sum(1 for score, _ in scores.values() if score)
+        score_mismatches = sum(
+            1 for uid, score in expected.items() if scores.get(uid) != score
+        ) + len(scores.keys() - expected.keys())
+        print(f"{miners} miners, best of {args.repeats}")
+        print(f"  string prefixes {string_time * 1000:8.1f} ms")
+        print(f"  packed index    {index_time * 1000:8.1f} ms")
+        print(f"  speedup         {string_time / index_time:8.1f}x")
+        print(f"  penalized       {penalized:8d}")
+        print(f"  vs string       {score_mismatches:8d} mismatches")
+
+        scorer = IncrementalIPScorer(addresses)
+        moved = synthetic_addresses(args.moved, seed=miners)
+        deltas = [
+            {uid: address for uid, address in zip(addresses, moved.values())},
+            {uid: addresses[uid] for uid in list(addresses)[: args.moved]},
+        ]
+        start = time.perf_counter()
+        for i in range(args.repeats * 2):
+            scorer.update(deltas[i % 2])
+        update_time = (time.perf_counter() - start) / (args.repeats * 2)
+        incremental = scorer.scores()
+        mismatches = sum(
+            1
+            for uid, score in penalize_addresses(addresses).items()
+            if incremental[uid] != score
+        )
+        print(f"  update {args.moved:3d} UIDs  {update_time * 1000:8.3f} ms")
+        print(f"  mismatches      {mismatches:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare query map snapshot formats on a synthetic balances map.
+
+    python -m benchmarks.bench_snapshot --keys 50000
+"""
+import argparse
+import json
+import random
+import string
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from generate.snapshot import (
+    msgpack,
+    read_snapshot,
+    snapshot_path,
+    write_atomic,
+    write_snapshot,
+)
+
+
+def synthetic_address(rng):
+    return "5" + "".join(rng.choices(string.ascii_letters + string.digits, k=47))
+
+
+def synthetic_balances(keys, seed=0):
+    rng = random.Random(seed)
+    return {
+        synthetic_address(rng): {
+            "nonce": rng.randint(0, 5000),
+            "consumers": 0,
+            "providers": 1,
+            "sufficients": 0,
+            "data": {
+                "free": rng.randint(0, 10**15),
+                "reserved": 0,
+                "frozen": 0,
+                "flags": 2**127,
+            },
+        }
+        for _ in range(keys)
+    }
+
+
+def best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    balances = synthetic_balances(args.keys)
+    rows = []
+    with TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "legacy" / "balances.json"
+
+        def write_legacy():
+            write_atomic(legacy, json.dumps(balances, indent=4).encode("utf-8"))
+
+        formats = [("json indent=4 (old)", write_legacy, lambda: legacy)]
+        for fmt in ("json", "msgpack"):
+            if fmt == "msgpack" and msgpack is None:
+                print("msgpack not installed, skipping")
+                continue
+            formats.append(
+                (
+                    fmt,
+                    lambda fmt=fmt: write_snapshot(tmp, "balances", balances, fmt=fmt),
+                    lambda fmt=fmt: snapshot_path(tmp, "balances", fmt),
+                )
+            )
+
+        for label, write, path_of in formats:
+            write_time = best_of(args.repeats, write)
+            path = path_of()
+            load_time = best_of(args.repeats, lambda: read_snapshot(path))
+            assert read_snapshot(path) == json.loads(json.dumps(balances))
+            rows.append((label, path.stat().st_size, write_time, load_time))
+
+    print(f"balances map with {args.keys} keys, best of {args.repeats}")
+    print(f"{'format':<22}{'size MB':>10}{'write s':>10}{'load s':>10}")
+    for label, size, write_time, load_time in rows:
+        print(f"{label:<22}{size / 1e6:>10.2f}{write_time:>10.3f}{load_time:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the vectorized weight outlier engine with the original
+statistics-module loop over a synthetic query_map_weights snapshot.
+
+python -m benchmarks.bench_weight_deviation --validators 50 200 --miners 1000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from validation.weight_engine import detect_outliers, identify_boosted_miners
+
+
+def synthetic_weights(validators, miners, seed=0):
+    """{validator: [[uid, weight], ...]} with a few validators boosting miners."""
+    rng = random.Random(seed)
+    data = {}
+    for validator in range(validators):
+        uids = rng.sample(range(miners), rng.randint(miners // 2, miners))
+        weights = [[uid, rng.randint(1, 1000)] for uid in sorted(uids)]
+        if validator % 10 == 0:
+            for pair in rng.sample(weights, 3):
+                pair[1] = rng.randint(20_000, 65_535)
+        data[str(validator)] = weights
+    return data
+
+
+def loop_detect_outliers(data, threshold=2):
+    """The original per-item detect_outliers."""
+    outliers = {}
+    for validator, weights in data.items():
+        if weights:
+            if flat_weights := [
+                w for sublist in weights for w in sublist if isinstance(w, (int, float))
+            ]:
+                mean = statistics.mean(flat_weights)
+                stdev = statistics.stdev(flat_weights)
+                for i, sublist in enumerate(weights):
+                    for j, weight in enumerate(sublist):
+                        if isinstance(weight, (int, float)):
+                            z_score = (weight - mean) / stdev
+                            if abs(z_score) > threshold:
+                                outliers.setdefault(validator, []).append(
+                                    (i, j, weight)
+                                )
+    return outliers
+
+
+def best_of(repeats, func, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--validators", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--miners", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for validators in args.validators:
+        data = synthetic_weights(validators, args.miners)
+        loop_time, expected = best_of(args.repeats, loop_detect_outliers, data)
+        engine_time, outliers = best_of(args.repeats, detect_outliers, data)
+        boosted = identify_boosted_miners(data, outliers)
+        entries = sum(len(weights) * 2 for weights in data.values())
+        print(f"{validators} validators x {args.miners} miners, {entries} values")
+        print(f"  statistics loop {loop_time * 1000:8.1f} ms")
+        print(f"  numpy engine    {engine_time * 1000:8.1f} ms")
+        print(f"  speedup         {loop_time / engine_time:8.1f}x")
+        print(f"  boosted miners  {len(boosted):8d}")
+        print(f"  identical       {str(outliers == expected):>8}")
+
+
+if __name__ == "__main__":
+    main()
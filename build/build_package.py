@@ -62,6 +62,11 @@ def main():
     for file_name in files_to_copy:
         shutil.copy(file_name, f"temp_bundle/{file_name}")
 
+    # data/client.py imports the shared node pool from generate/client.py.
+    os.mkdir("temp_bundle/generate")
+    open("temp_bundle/generate/__init__.py", "w").close()
+    shutil.copy("../generate/client.py", "temp_bundle/generate/client.py")
+
     # Create a zip file
     with zipfile.ZipFile("app_bundle.zip", "w", zipfile.ZIP_DEFLATED) as zip_file:
         zip_directory("temp_bundle", zip_file)
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# One node pool for the whole repository lives in generate/client.py. The
+# standalone bundle ships it next to data/ (see build_package.py); from a
+# repository checkout it is two levels up.
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+if (_REPO_ROOT / "generate" / "client.py").exists() and str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from generate.client import (  # noqa: E402 - needs the path set up above
+    ClientPool,
+    LazyClient,
+    NodeUnavailable,
+    client_pool,
+    comx,
+    get_client,
+    has_query,
+    run_query,
+)
+
+__all__ = [
+    "ClientPool",
+    "LazyClient",
+    "NodeUnavailable",
+    "client_pool",
+    "comx",
+    "get_client",
+    "has_query",
+    "run_query",
+]
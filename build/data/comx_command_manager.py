@@ -3,8 +3,9 @@ from data_models import comx, wallet
 
 
 class ComxCommandManager:
-    def __init__(self, querymap_path="./query_maps"):
+    def __init__(self, querymap_path="./query_maps", client=comx):
         self.querymap_path = querymap_path
+        self.client = client
         self.query_maps = {}
         self.commands_list = []
         self.commands_string = ""
@@ -13,7 +14,7 @@ class ComxCommandManager:
         self.wallet = wallet
         
     def get_command_list(self):
-        commands = comx.__dir__()
+        commands = dir(self.client)
         self.commands_list = [command for command in commands if not command.startswith("_")]
         return self.commands_list
 
@@ -23,13 +24,13 @@ class ComxCommandManager:
         
     def get_commands_dict(self):
         for command in self.commands_list:
-            self.commands[command] = comx.__getattribute__(command)
+            self.commands[command] = getattr(self.client, command)
         return self.commands
 
     def get_query_map_list(self):
         for command in self.commands_list:
             if command.startswith("query_map_"):
-                self.query_maps[command] = comx.__getattribute__(command)
+                self.query_maps[command] = getattr(self.client, command)
         return self.query_maps
                 
     def _execute_command(self, command_name, **kwargs):
@@ -4,9 +4,8 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from communex.client import CommuneClient
-from communex._common import get_node_url
 from substrateinterface import Keypair
+from data.client import LazyClient
 from data.comx_command_manager import ComxCommandManager
 from encryption.wallet import Wallet
 from encryption.custom_errors import (
@@ -49,8 +48,8 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Initialize Jinja2 templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize CommuneClient
-comx = CommuneClient(get_node_url())
+# CommuneClient, connected on first use
+comx = LazyClient()
 
 __all__ = [
     "KeyNotFoundError",
@@ -0,0 +1,122 @@
+import numpy as np
+
+NANO = 1_000_000_000
+
+
+def _stake_totals(addresses, stake_map):
+    """Sum every address's stake list in one reduceat over a flat int64 array."""
+    lists = [stake_map.get(address) for address in addresses]
+    present = np.array([s is not None for s in lists], dtype=bool)
+    lengths = np.array([len(s) if s else 0 for s in lists], dtype=np.int64)
+    amounts = np.array([stake[1] for s in lists if s for stake in s], dtype=np.int64)
+    totals = np.zeros(len(lists), np.int64)
+    nonempty = lengths > 0
+    if nonempty.any():
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        totals[nonempty] = np.add.reduceat(amounts, starts[nonempty])
+    return totals, present
+
+
+def raw_columns_from_maps(addresses, balance_map, staketo_map, stakefrom_map):
+    """Aligned raw columns for addresses, each a (totals, present) pair."""
+    accounts = [balance_map.get(address) for address in addresses]
+    balance_present = np.array([a is not None for a in accounts], dtype=bool)
+    balance = np.array(
+        [a["data"]["free"] if a is not None else 0 for a in accounts], dtype=np.int64
+    )
+    return (
+        (balance, balance_present),
+        _stake_totals(addresses, staketo_map),
+        _stake_totals(addresses, stakefrom_map),
+    )
+
+
+def raw_columns_from_totals(addresses, balance_map, stake_totals):
+    """Same columns, taking stake sums from the precomputed stake_totals map."""
+    accounts = [balance_map.get(address) for address in addresses]
+    totals = [stake_totals.get(address) for address in addresses]
+    columns = [
+        (
+            np.array(
+                [a["data"]["free"] if a is not None else 0 for a in accounts],
+                dtype=np.int64,
+            ),
+            np.array([a is not None for a in accounts], dtype=bool),
+        )
+    ]
+    for field in ("staketo", "stakefrom"):
+        values = [t[field] if t is not None else None for t in totals]
+        columns.append(
+            (
+                np.array([v or 0 for v in values], dtype=np.int64),
+                np.array([v is not None for v in values], dtype=bool),
+            )
+        )
+    return tuple(columns)
+
+
+def raw_columns_from_rows(addresses, rows):
+    """Same columns from BalanceIndex.lookup() rows {address: (balance, to, from)}."""
+    missing = (None, None, None)
+    columns = []
+    for column in range(3):
+        values = [rows.get(address, missing)[column] for address in addresses]
+        present = np.array([v is not None for v in values], dtype=bool)
+        totals = np.array([v or 0 for v in values], dtype=np.int64)
+        columns.append((totals, present))
+    return tuple(columns)
+
+
+def _round2(values):
+    # np.round scales by 100 first, so a value within a few ulps of a half
+    # cent can tip the other way from Python's exact round() (12.345 gives
+    # 12.34 instead of 12.35). Re-round only those near-ties in Python.
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 4 * np.spacing(scaled)
+    if near_tie.any():
+        rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+    return rounded
+
+
+def _to_tokens(totals, present):
+    return np.where(present, _round2(totals / NANO), 0.0)
+
+
+def balance_columns(raw_columns):
+    """Return balance, stake, total and stake_from arrays rounded like get_balances."""
+    balance_raw, staketo_raw, stakefrom_raw = raw_columns
+    balance = _to_tokens(*balance_raw)
+    stake = _to_tokens(*staketo_raw)
+    stake_from = _to_tokens(*stakefrom_raw)
+    total = _round2(balance + stake)
+    return {
+        "balance": balance,
+        "stake": stake,
+        "total": total,
+        "stake_from": stake_from,
+    }
+
+
+def build_key_dict(key_data, columns):
+    """Assemble the get_balances() key_dict from balance_columns() output."""
+    lists = {field: column.tolist() for field, column in columns.items()}
+    key_dict = {}
+    for i, (ss58key, value) in enumerate(key_data.items()):
+        key_dict[ss58key] = {
+            "key": ss58key,
+            "name": value["name"],
+            "balance": lists["balance"][i] or 0,
+            "stake": lists["stake"][i] or 0,
+            "total": lists["total"][i] or 0,
+            "stake_from": lists["stake_from"][i] or 0,
+        }
+    return key_dict
+
+
+def compute_key_dict(key_data, balance_map, staketo_map, stakefrom_map):
+    addresses = list(key_data)
+    raw_columns = raw_columns_from_maps(
+        addresses, balance_map, staketo_map, stakefrom_map
+    )
+    return build_key_dict(key_data, balance_columns(raw_columns))
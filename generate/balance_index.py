@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+from generate.query_map_store import query_map_store
+from generate.stake_totals import STAKEFROM_SOURCE, STAKETO_SOURCE
+
+BALANCE_BACKEND = os.getenv("BALANCE_BACKEND", "memory")
+BALANCE_INDEX_PATH = os.getenv("BALANCE_INDEX_PATH", "query_maps/balances.sqlite")
+
+# Stay well under SQLite's bound parameter limit on older builds.
+LOOKUP_CHUNK = 900
+
+SCHEMA = """
+CREATE TABLE accounts (
+    address TEXT PRIMARY KEY,
+    balance INTEGER,
+    staketo INTEGER,
+    stakefrom INTEGER
+) WITHOUT ROWID;
+CREATE TABLE stakes (
+    address TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    counterparty TEXT NOT NULL,
+    amount INTEGER NOT NULL
+);
+CREATE INDEX stakes_address ON stakes (address, direction);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER) WITHOUT ROWID;
+"""
+
+
+class BalanceIndex:
+    """SQLite index of balances and stake keyed by ss58 address.
+
+    Per-address totals are computed once at ingest, so a keyring lookup is
+    a single indexed query no matter how large the chain-wide maps get.
+    A NULL column means the address is missing from that query map.
+    """
+
+    def __init__(self, path=BALANCE_INDEX_PATH, store=query_map_store):
+        self.path = Path(path)
+        self.store = store
+        self._lock = threading.Lock()
+
+    def _connect(self, path=None):
+        return sqlite3.connect(path or self.path)
+
+    def generation(self):
+        if not self.path.exists():
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'generation'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def ingest(self, balances, staketo, stakefrom, generation=0):
+        accounts = {}
+        for address, account in balances.items():
+            accounts[address] = [account["data"]["free"], None, None]
+        stakes = []
+        for column, direction, query_map in (
+            (1, "to", staketo),
+            (2, "from", stakefrom),
+        ):
+            for address, stake_list in query_map.items():
+                row = accounts.setdefault(address, [None, None, None])
+                row[column] = sum(amount for _, amount in stake_list)
+                stakes.extend(
+                    (address, direction, counterparty, amount)
+                    for counterparty, amount in stake_list
+                )
+
+        # Build next to the live file and swap it in, readers holding the old
+        # connection keep a consistent view until they reconnect.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = self._connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                "INSERT INTO accounts VALUES (?, ?, ?, ?)",
+                ((address, *row) for address, row in accounts.items()),
+            )
+            conn.executemany("INSERT INTO stakes VALUES (?, ?, ?, ?)", stakes)
+            conn.execute("INSERT INTO meta VALUES ('generation', ?)", (generation,))
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+
+    def ingest_from_store(self):
+        generation = self.store.generation()
+        self.ingest(
+            self.store.get("balances"),
+            self.store.get(STAKETO_SOURCE),
+            self.store.get(STAKEFROM_SOURCE),
+            generation,
+        )
+        return generation
+
+    def ensure_current(self):
+        with self._lock:
+            if self.generation() != self.store.generation():
+                self.ingest_from_store()
+
+    def lookup(self, addresses):
+        """Return {address: (balance, staketo, stakefrom)} for known addresses."""
+        self.ensure_current()
+        addresses = list(addresses)
+        rows = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(addresses), LOOKUP_CHUNK):
+                chunk = addresses[start : start + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for address, *totals in conn.execute(
+                    "SELECT address, balance, staketo, stakefrom FROM accounts "
+                    f"WHERE address IN ({placeholders})",
+                    chunk,
+                ):
+                    rows[address] = tuple(totals)
+        return rows
+
+    def stakes(self, address, direction="to"):
+        self.ensure_current()
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT counterparty, amount FROM stakes "
+                "WHERE address = ? AND direction = ?",
+                (address, direction),
+            ).fetchall()
+
+
+balance_index = BalanceIndex()
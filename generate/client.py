@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from functools import partial
+
+from communex._common import get_node_url
+from communex.client import CommuneClient
+from loguru import logger
+
+# Defaults follow the query map settings this client used to be built with.
+COMX_NUM_CONNECTIONS = int(
+    os.getenv("COMX_NUM_CONNECTIONS", os.getenv("QUERY_MAP_NODE_CONCURRENCY", 4))
+)
+COMX_TIMEOUT = int(
+    float(os.getenv("COMX_TIMEOUT", os.getenv("QUERY_MAP_TIMEOUT", 120)))
+)
+# Comma separated node URLs, defaults to communex's own node for the network.
+NODE_URLS = [
+    url.strip() for url in os.getenv("NODE_URLS", "").split(",") if url.strip()
+]
+NODE_FAILURE_THRESHOLD = int(os.getenv("NODE_FAILURE_THRESHOLD", 3))
+NODE_COOLDOWN = float(os.getenv("NODE_COOLDOWN", 30))
+NODE_HEALTH_INTERVAL = float(os.getenv("NODE_HEALTH_INTERVAL", 60))
+NODE_HEALTH_METHOD = os.getenv("NODE_HEALTH_METHOD", "get_block")
+# Weight of the newest sample in each node's moving latency average.
+LATENCY_ALPHA = 0.3
+# Client methods that only read chain state and are safe to retry on another node.
+READ_ONLY_PREFIXES = ("query", "get_")
+
+
+class NodeUnavailable(Exception):
+    pass
+
+
+def is_read_only(method_name):
+    return method_name.startswith(READ_ONLY_PREFIXES)
+
+
+class Node:
+    """One node URL with its client, circuit breaker state and metrics."""
+
+    def __init__(self, url, max_concurrency):
+        self.url = url
+        self.client = None
+        self.connect_lock = threading.Lock()
+        self.limit = threading.BoundedSemaphore(max_concurrency)
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_error = None
+        # Set while the single trial call of a half-open circuit runs.
+        self.probing = False
+
+    def state(self, cooldown, now=None):
+        if self.opened_at is None:
+            return "closed"
+        now = time.monotonic() if now is None else now
+        return "half-open" if now - self.opened_at >= cooldown else "open"
+
+    def metrics(self, cooldown):
+        return {
+            "url": self.url,
+            "state": self.state(cooldown),
+            "latency_ms": (
+                None if self.latency is None else round(self.latency * 1000, 1)
+            ),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class ClientPool:
+    """CommuneClients for several nodes, picked by latency with failover.
+
+    Calls go to the fastest node whose circuit is closed. A node that fails
+    failure_threshold times in a row is skipped for cooldown seconds, then
+    gets a trial call (half-open) that closes the circuit on success. A
+    failed read-only call is retried on the next node before the error is
+    raised. Anything else, such as a transfer or stake extrinsic, goes to
+    one node only: a timeout after the node broadcast it must not submit
+    it a second time.
+    """
+
+    def __init__(
+        self,
+        urls=None,
+        factory=CommuneClient,
+        max_concurrency=COMX_NUM_CONNECTIONS,
+        timeout=COMX_TIMEOUT,
+        failure_threshold=NODE_FAILURE_THRESHOLD,
+        cooldown=NODE_COOLDOWN,
+    ):
+        self.urls = list(urls or NODE_URLS)
+        self.factory = factory
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._nodes = None
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            with self._lock:
+                if self._nodes is None:
+                    urls = self.urls or [get_node_url()]
+                    self._nodes = [Node(url, self.max_concurrency) for url in urls]
+        return self._nodes
+
+    def _connect(self, node):
+        with node.connect_lock:
+            if node.client is None:
+                logger.info(f"Connecting to {node.url}")
+                # One websocket connection per concurrent call, otherwise the
+                # client serializes every query_map on a single connection.
+                node.client = self.factory(
+                    node.url, num_connections=self.max_concurrency, timeout=self.timeout
+                )
+        return node.client
+
+    def ranked(self, now=None):
+        """Usable nodes, fastest first. Nodes without a sample yet go first."""
+        usable = [
+            node
+            for node in self.nodes
+            if node.state(self.cooldown, now) == "closed"
+            or (node.state(self.cooldown, now) == "half-open" and not node.probing)
+        ]
+        return sorted(usable, key=lambda node: node.latency or 0.0)
+
+    def _admit(self, node):
+        """Claim the one trial call of a half-open node, False if already taken."""
+        with self._lock:
+            if node.state(self.cooldown) != "half-open":
+                return True
+            if node.probing:
+                return False
+            node.probing = True
+            return True
+
+    def _record(self, node, started, error=None):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            node.probing = False
+            node.requests += 1
+            if error is None:
+                node.latency = (
+                    elapsed
+                    if node.latency is None
+                    else LATENCY_ALPHA * elapsed + (1 - LATENCY_ALPHA) * node.latency
+                )
+                node.consecutive_failures = 0
+                node.opened_at = None
+                return
+            node.failures += 1
+            node.consecutive_failures += 1
+            node.last_error = str(error)
+            half_open = node.opened_at is not None
+            if half_open or node.consecutive_failures >= self.failure_threshold:
+                node.opened_at = time.monotonic()
+                logger.warning(f"Node {node.url} unavailable for {self.cooldown}s")
+
+    def run_on(self, node, func):
+        """func(client) on one node, counted in its metrics and circuit."""
+        if not self._admit(node):
+            raise NodeUnavailable(f"{node.url} is running its trial call")
+        started = time.monotonic()
+        try:
+            with node.limit:
+                result = func(self._connect(node))
+        except Exception as e:
+            self._record(node, started, e)
+            raise
+        self._record(node, started)
+        return result
+
+    def run(self, func, label=None, failover=True):
+        """func(client) on the best node, failing over to the next one.
+
+        With failover=False only the best node is tried.
+        """
+        label = label or getattr(func, "__name__", "call")
+        error = None
+        nodes = self.ranked()
+        for node in nodes if failover else nodes[:1]:
+            try:
+                return self.run_on(node, func)
+            except Exception as e:
+                error = e
+                logger.error(f"{label} failed on {node.url}: {e}")
+        if error is None:
+            raise NodeUnavailable("Every node is cooling down after failures")
+        raise error
+
+    def call_on(self, node, method_name, *args, **kwargs):
+        return self.run_on(
+            node, lambda client: getattr(client, method_name)(*args, **kwargs)
+        )
+
+    def call(self, method_name, *args, **kwargs):
+        return self.run(
+            lambda client: getattr(client, method_name)(*args, **kwargs),
+            label=method_name,
+            failover=is_read_only(method_name),
+        )
+
+    def client(self):
+        """Connected CommuneClient of the best node, for direct use."""
+        error = None
+        for node in self.ranked():
+            started = time.monotonic()
+            try:
+                return self._connect(node)
+            except Exception as e:
+                error = e
+                self._record(node, started, e)
+        raise error or NodeUnavailable("Every node is cooling down after failures")
+
+    def check_health(self, method_name=NODE_HEALTH_METHOD):
+        """Probe every node, cooling down or not, to refresh latency and breakers."""
+        for node in self.nodes:
+            try:
+                self.call_on(node, method_name)
+            except Exception as e:
+                logger.error(f"Health check failed on {node.url}: {e}")
+        return self.metrics()
+
+    def _health_loop(self, interval):
+        while not self._stopped.wait(interval):
+            self.check_health()
+
+    def start_health_checks(self, interval=NODE_HEALTH_INTERVAL):
+        if interval <= 0 or self._health_thread is not None:
+            return
+        self._stopped.clear()
+        self._health_thread = threading.Thread(
+            target=self._health_loop, args=(interval,), name="node-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stopped.set()
+        self._health_thread = None
+
+    def metrics(self):
+        return [node.metrics(self.cooldown) for node in self.nodes]
+
+
+client_pool = ClientPool()
+
+
+def get_client():
+    """CommuneClient of the best node, connected on first use."""
+    return client_pool.client()
+
+
+class LazyClient:
+    """Stands in for a module level `comx = CommuneClient(...)`.
+
+    Method calls go through the pool, so read-only queries fail over
+    between nodes while extrinsics are sent to a single node.
+    """
+
+    def __init__(self, pool=client_pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        if callable(getattr(CommuneClient, name, None)):
+            return partial(self._pool.call, name)
+        return getattr(self._pool.client(), name)
+
+    def __dir__(self):
+        return dir(CommuneClient)
+
+
+comx = LazyClient()
+
+
+def has_query(method_name, client_class=CommuneClient):
+    """Whether this communex version provides the query method, without connecting."""
+    return callable(getattr(client_class, method_name, None))
+
+
+def run_query(method_name, *args, **kwargs):
+    return client_pool.call(method_name, *args, **kwargs)
@@ -1,15 +1,11 @@
 from loguru import logger
 
-from generate.get_all_balance import check_keyring
-from generate.query_maps import REPORT_MAP
+from generate.reports import get_report
 
 
 def process_data(report_selection):
     logger.info("process_data")
-    check_keyring(REPORT_MAP[report_selection])
-    with open("main_reports/keyring.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data
+    return get_report(report_selection)
 
 
 def generate_json_object(data):
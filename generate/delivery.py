@@ -0,0 +1,272 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from generate.snapshot import write_atomic
+
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", 30))
+WEBHOOK_POOL_SIZE = int(os.getenv("WEBHOOK_POOL_SIZE", 4))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", 10))
+WEBHOOK_FLUSH_INTERVAL = float(os.getenv("WEBHOOK_FLUSH_INTERVAL", 1))
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", 5))
+WEBHOOK_BACKOFF = float(os.getenv("WEBHOOK_BACKOFF", 1))
+WEBHOOK_MAX_BACKOFF = float(os.getenv("WEBHOOK_MAX_BACKOFF", 60))
+WEBHOOK_BUFFER_SIZE = int(os.getenv("WEBHOOK_BUFFER_SIZE", 1000))
+WEBHOOK_SPILL_DIR = os.getenv("WEBHOOK_SPILL_DIR", "")
+
+# 429 and 5xx are worth retrying, any other error status never will succeed.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DeliveryError(Exception):
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+class WebhookDelivery:
+    """Background delivery of report payloads to one webhook URL.
+
+    enqueue() never blocks on the network. A worker thread takes up to
+    batch_size queued payloads per request over a pooled session; a single
+    payload is posted as is, several are posted as a JSON list. Failed
+    batches are retried with exponential backoff. When the buffer is full,
+    payloads spill to spill_dir (or the oldest is dropped without one) and
+    are read back once there is room.
+    """
+
+    def __init__(
+        self,
+        url,
+        timeout=WEBHOOK_TIMEOUT,
+        pool_size=WEBHOOK_POOL_SIZE,
+        batch_size=WEBHOOK_BATCH_SIZE,
+        flush_interval=WEBHOOK_FLUSH_INTERVAL,
+        max_retries=WEBHOOK_MAX_RETRIES,
+        backoff=WEBHOOK_BACKOFF,
+        max_backoff=WEBHOOK_MAX_BACKOFF,
+        buffer_size=WEBHOOK_BUFFER_SIZE,
+        spill_dir=WEBHOOK_SPILL_DIR,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.buffer_size = buffer_size
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = {
+            "enqueued": 0,
+            "sent": 0,
+            "batches": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "last_latency": None,
+            "last_error": None,
+        }
+        self._buffer = deque()
+        self._spill_seq = 0
+        self._has_spill = bool(self.spill_dir and self._spilled_files())
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._inflight = 0
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return self._thread
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="webhook-delivery", daemon=True
+            )
+            self._thread.start()
+            return self._thread
+
+    def stop(self, timeout=30):
+        """Flush what is queued within timeout, spill the rest, stop the worker."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._buffer or self._inflight or self._has_spill) and self.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._stopping.set()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(max(deadline - time.monotonic(), 0) + self.timeout)
+        with self._cond:
+            self._spill(list(self._buffer))
+            self._buffer.clear()
+
+    def enqueue(self, payload):
+        with self._cond:
+            self.metrics["enqueued"] += 1
+            if self.spill_dir is not None and (
+                self._has_spill or len(self._buffer) >= self.buffer_size
+            ):
+                # Queue behind what is already on disk to keep delivery order.
+                self._spill([payload])
+            else:
+                if len(self._buffer) >= self.buffer_size:
+                    self._spill([self._buffer.popleft()])
+                self._buffer.append(payload)
+            self._cond.notify_all()
+        if not self.running:
+            self.start()
+        return True
+
+    def send(self, payload):
+        """Post one payload now, with retries, and return True once delivered.
+
+        Unlike enqueue() this blocks, for callers that must know the outcome.
+        """
+        return self._deliver([payload])
+
+    def pending(self):
+        with self._cond:
+            spilled = len(self._spilled_files()) if self._has_spill else 0
+            return len(self._buffer) + self._inflight + spilled
+
+    def stats(self):
+        with self._cond:
+            return {**self.metrics, "queued": len(self._buffer)}
+
+    def _spilled_files(self):
+        if not self.spill_dir.exists():
+            return []
+        return sorted(self.spill_dir.glob("*.json"))
+
+    def _spill(self, payloads):
+        """Write payloads to spill_dir, without one they are dropped."""
+        if not payloads:
+            return
+        if self.spill_dir is None:
+            self.metrics["dropped"] += len(payloads)
+            logger.warning(f"Dropped {len(payloads)} webhook payloads for {self.url}")
+            return
+        for payload in payloads:
+            self._spill_seq += 1
+            path = self.spill_dir / f"{time.time_ns()}-{self._spill_seq:06d}.json"
+            write_atomic(path, json.dumps(payload).encode("utf-8"))
+        self.metrics["spilled"] += len(payloads)
+        self._has_spill = True
+
+    def _reload_spilled(self):
+        if not self._has_spill:
+            return
+        for path in self._spilled_files():
+            if len(self._buffer) >= self.buffer_size:
+                return
+            try:
+                self._buffer.append(json.loads(path.read_text()))
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable spilled webhook payload {path}: {e}")
+            path.unlink(missing_ok=True)
+        self._has_spill = False
+
+    def _take_batch(self):
+        with self._cond:
+            self._reload_spilled()
+            if not self._buffer and not self._stopping.is_set():
+                self._cond.wait(self.flush_interval)
+                self._reload_spilled()
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            self._inflight = len(batch)
+            return batch
+
+    def _post(self, batch):
+        body = batch[0] if len(batch) == 1 else batch
+        started = time.monotonic()
+        try:
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise DeliveryError(str(e)) from e
+        self.metrics["last_latency"] = time.monotonic() - started
+        if response.status_code >= 400:
+            raise DeliveryError(
+                f"HTTP {response.status_code}",
+                retry=response.status_code in RETRY_STATUSES,
+            )
+        return response
+
+    def _deliver(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._post(batch)
+                self.metrics["sent"] += len(batch)
+                self.metrics["batches"] += 1
+                return True
+            except DeliveryError as e:
+                self.metrics["last_error"] = str(e)
+                logger.error(f"Webhook delivery to {self.url} failed: {e}")
+                if not e.retry or attempt == self.max_retries:
+                    break
+                self.metrics["retries"] += 1
+                delay = min(self.backoff * 2**attempt, self.max_backoff)
+                if self._stopping.wait(delay * random.uniform(0.5, 1)):
+                    break
+        self.metrics["failed"] += len(batch)
+        return False
+
+    def _run(self):
+        # Whatever is still buffered when stopping is spilled by stop().
+        while not self._stopping.is_set():
+            batch = self._take_batch()
+            if not batch:
+                continue
+            delivered = self._deliver(batch)
+            with self._cond:
+                if not delivered and self._stopping.is_set():
+                    # Keep what the shutdown interrupted for the next run.
+                    self.metrics["failed"] -= len(batch)
+                    self._spill(batch)
+                self._inflight = 0
+                self._cond.notify_all()
+
+
+_deliveries = {}
+_deliveries_lock = threading.Lock()
+
+
+def delivery_for(url):
+    """Shared WebhookDelivery per URL, so every caller reuses one pool and queue."""
+    with _deliveries_lock:
+        if url not in _deliveries:
+            _deliveries[url] = WebhookDelivery(url)
+        return _deliveries[url]
+
+
+def stop_deliveries(timeout=30):
+    with _deliveries_lock:
+        deliveries = list(_deliveries.values())
+    for delivery in deliveries:
+        delivery.stop(timeout)
+
+
+def delivery_stats():
+    with _deliveries_lock:
+        return {url: delivery.stats() for url, delivery in _deliveries.items()}
@@ -1,20 +1,38 @@
 import json
+import os
+from pathlib import Path
 from wallet.get_key_dict import get_key_dict
+from generate.query_map_store import query_map_store
+from generate.balance_index import BALANCE_BACKEND, balance_index
+from generate.balance_engine import (
+    balance_columns,
+    build_key_dict,
+    raw_columns_from_maps,
+    raw_columns_from_rows,
+    raw_columns_from_totals,
+)
+from generate.keyring_maps import keyring_maps
+from generate.stake_totals import STAKEFROM_SOURCE, STAKETO_SOURCE, get_stake_totals
+from generate.snapshot import write_atomic
+
+REPORT_OUTPUT_DIR = os.getenv("REPORT_OUTPUT_DIR", "main_reports/keyrings")
+WRITE_REPORT_OUTPUTS = os.getenv("WRITE_REPORT_OUTPUTS", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
 
 
 def get_balance_map():
-    with open("query_maps/balances.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get("balances")
 
 
 def get_staketo_map():
-    with open("query_maps/staketo.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get(STAKETO_SOURCE)
 
 
 def get_stakefrom_map():
-    with open("query_maps/stakefrom.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get(STAKEFROM_SOURCE)
 
 
 def get_balance(ss58key):
@@ -24,6 +42,12 @@ def get_balance(ss58key):
 
 
 def get_staketo(ss58key):
+    stake_totals = get_stake_totals()
+    if stake_totals is not None:
+        staketo = stake_totals[ss58key]["staketo"]
+        if staketo is None:
+            raise KeyError(ss58key)
+        return staketo
     query_map = get_staketo_map()
     staketo = 0
     staketo_list = query_map[ss58key]
@@ -34,6 +58,12 @@ def get_staketo(ss58key):
 
 
 def get_stakefrom(ss58key):
+    stake_totals = get_stake_totals()
+    if stake_totals is not None:
+        stakefrom = stake_totals[ss58key]["stakefrom"]
+        if stakefrom is None:
+            raise KeyError(ss58key)
+        return stakefrom
     query_map = get_stakefrom_map()
     stakefrom = 0
     stakefrom_list = query_map[ss58key]
@@ -43,6 +73,28 @@ def get_stakefrom(ss58key):
     return stakefrom
 
 
+def keyring_columns(addresses):
+    """Rounded balance, stake, total and stake_from arrays aligned to addresses."""
+    addresses = list(addresses)
+    # Fresh keyring-only snapshots from a targeted refresh win over the
+    # chain-wide maps they were fetched in place of.
+    keyring = keyring_maps(("balances", STAKETO_SOURCE, STAKEFROM_SOURCE))
+    if keyring is not None:
+        return balance_columns(raw_columns_from_maps(addresses, *keyring))
+    stake_totals = get_stake_totals()
+    if BALANCE_BACKEND == "sqlite":
+        raw_columns = raw_columns_from_rows(addresses, balance_index.lookup(addresses))
+    elif stake_totals is not None:
+        raw_columns = raw_columns_from_totals(
+            addresses, get_balance_map(), stake_totals
+        )
+    else:
+        raw_columns = raw_columns_from_maps(
+            addresses, get_balance_map(), get_staketo_map(), get_stakefrom_map()
+        )
+    return balance_columns(raw_columns)
+
+
 def get_all_balances(key_dict):
     min_bal = 0.5
     dictionary = {}
@@ -75,24 +127,13 @@ def get_all_balances(key_dict):
 def get_balances(key_data):
     key_dict = {}
     lines = []
-    balance_querymap = get_balance_map()
-    staketo_querymap = get_staketo_map()
-    stakefrom_querymap = get_stakefrom_map()
     try:
-        for ss58key, value in key_data.items():
-            name = value["name"]
-            balance = 0
-            staketo = 0
-            stakefrom = 0
-            total = 0
-
-            if ss58key in balance_querymap.keys():
-                balance = round((get_balance(ss58key) / 1_000_000_000), 2) or 0
-            if ss58key in staketo_querymap.keys():
-                staketo = round((get_staketo(ss58key) / 1_000_000_000), 2) or 0
-            if ss58key in stakefrom_querymap.keys():
-                stakefrom = round((get_stakefrom(ss58key) / 1_000_000_000), 2) or 0
-            total = round((balance + staketo), 2) or 0
+        key_dict = build_key_dict(key_data, keyring_columns(key_data))
+        for entry in key_dict.values():
+            balance = entry["balance"]
+            staketo = entry["stake"]
+            total = entry["total"]
+            stakefrom = entry["stake_from"]
 
             print("")
             print(f"Balance    {balance}")
@@ -102,14 +143,6 @@ def get_balances(key_data):
             print(f"StakeFrom  {stakefrom}")
             print("            ===========")
 
-            key_dict[ss58key] = {
-                "key": ss58key,
-                "name": name,
-                "balance": balance,
-                "stake": staketo,
-                "total": total,
-                "stake_from": stakefrom,
-            }
             lines.extend(
                 (
                     "",
@@ -126,13 +159,22 @@ def get_balances(key_data):
     return key_dict
 
 
+def report_output_path(key_path):
+    return Path(REPORT_OUTPUT_DIR) / Path(key_path).name
+
+
 def check_keyring(key_path):
     key_dict = get_key_dict(key_path)
     key_dict = get_balances(key_dict)
-    with open("main_reports/keyring.json", "w", encoding="utf-8") as f:
-        json.dump(key_dict, f, indent=4)
+    if WRITE_REPORT_OUTPUTS:
+        # One file per report, swapped in atomically, so concurrent reports
+        # never overwrite or half-read each other's output.
+        write_atomic(
+            report_output_path(key_path),
+            json.dumps(key_dict, indent=4).encode("utf-8"),
+        )
     return key_dict
 
 
 if __name__ == "__main__":
-    check_keyring("eden")
+    check_keyring("main_reports/eden.json")
@@ -1,11 +1,24 @@
-from pathlib import Path
-from communex._common import get_node_url
-from communex.client import CommuneClient
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
-import json
+from functools import partial
+import os
+import time as timer
 
-comx = CommuneClient(get_node_url())
+from generate.client import run_query
+from generate.query_map_store import query_map_store
+from generate.balance_index import BALANCE_BACKEND, balance_index
+from generate.refresher import QUERY_MAP_MAX_AGE, QueryMapRefresher
+from generate.schedule import AdaptiveSchedule
+from generate.snapshot import encode_snapshot, write_encoded_snapshot, write_snapshot
+from generate.snapshot_history import SNAPSHOT_HISTORY, query_map_history
+from generate.keyring_maps import keyring_map_name
+from generate.targeted_fetch import targeted_fetchers
+from generate.stake_totals import STAKEFROM_SOURCE, STAKETO_SOURCE, update_stake_totals
+
+QUERY_MAP_WORKERS = int(os.getenv("QUERY_MAP_WORKERS", 8))
+QUERY_MAP_TIMEOUT = float(os.getenv("QUERY_MAP_TIMEOUT", 120))
+QUERY_MAP_RETRIES = int(os.getenv("QUERY_MAP_RETRIES", 2))
 
 
 class QUERY_MAP_CHOICES(Enum):
@@ -33,72 +46,180 @@ class QUERY_MAP_CHOICES(Enum):
     registration_blocks: str = "registration_blocks"
 
 
+# Client method names, resolved when a map is fetched.
 QUERY_MAP = {
-    "weights": comx.query_map_weights,
-    "key": comx.query_map_key,
-    "address": comx.query_map_address,
-    "emission": comx.query_map_emission,
-    "incentive": comx.query_map_incentive,
-    "dividend": comx.query_map_dividend,
-    "regblock": comx.query_map_regblock,
-    "lastupdate": comx.query_map_lastupdate,
-    "total_stake": comx.query_map_staketo,
-    "stakefrom": comx.query_map_stakefrom,
-    "delegationfee": comx.query_map_delegationfee,
-    "tempo": comx.query_map_tempo,
-    "min_allowed_weights": comx.query_map_min_allowed_weights,
-    "max_allowed_weights": comx.query_map_max_allowed_weights,
-    "max_allowed_uids": comx.query_map_max_allowed_uids,
-    "founder": comx.query_map_founder,
-    "founder_share": comx.query_map_founder_share,
-    "incentive_ratio": comx.query_map_incentive_ratio,
-    "trust_ratio": comx.query_map_trust_ratio,
-    "subnet_names": comx.query_map_subnet_names,
-    "balances": comx.query_map_balances,
-    "registration_blocks": comx.query_map_registration_blocks,
+    "weights": "query_map_weights",
+    "key": "query_map_key",
+    "address": "query_map_address",
+    "emission": "query_map_emission",
+    "incentive": "query_map_incentive",
+    "dividend": "query_map_dividend",
+    "regblock": "query_map_regblock",
+    "lastupdate": "query_map_lastupdate",
+    "total_stake": "query_map_staketo",
+    "stakefrom": "query_map_stakefrom",
+    "delegationfee": "query_map_delegationfee",
+    "tempo": "query_map_tempo",
+    "min_allowed_weights": "query_map_min_allowed_weights",
+    "max_allowed_weights": "query_map_max_allowed_weights",
+    "max_allowed_uids": "query_map_max_allowed_uids",
+    "founder": "query_map_founder",
+    "founder_share": "query_map_founder_share",
+    "incentive_ratio": "query_map_incentive_ratio",
+    "trust_ratio": "query_map_trust_ratio",
+    "subnet_names": "query_map_subnet_names",
+    "balances": "query_map_balances",
+    "registration_blocks": "query_map_registration_blocks",
 }
 
 
-def recordtime():
+def recordtime(changed=True):
     time = datetime.now().timestamp()
-    with open("query_maps/time.json", "w", encoding="utf-8") as f:
-        save_time = {"time": time}
-        print(time)
-        f.write(json.dumps(save_time))
-
-
-def update_query_maps():
-    for choice_key in QUERY_MAP_CHOICES.__iter__():
-        print(f"Updating {choice_key}")
-        query_map = QUERY_MAP[choice_key.value]()
-        with open(f"query_maps/{choice_key.value}.json", "w", encoding="utf-8") as f:
-            f.write(json.dumps(query_map))
-    recordtime()
+    generation = query_map_store.generation() + int(changed)
+    save_time = {"time": time, "generation": generation}
+    print(time)
+    write_snapshot("query_maps", "time", save_time, fmt="json")
+    query_map_store.invalidate()
+
+
+def save_query_map(name, query_map):
+    raw = encode_snapshot(query_map)
+    write_encoded_snapshot("query_maps", name, raw)
+    return raw
+
+
+def refresh_query_map(name, retries=QUERY_MAP_RETRIES, schedule=None, fetch=None):
+    # The pool bounds concurrent calls per node and fails over.
+    fetch = fetch or partial(run_query, QUERY_MAP[name])
+    start = timer.perf_counter()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            query_map = fetch()
+            raw = save_query_map(name, query_map)
+            if SNAPSHOT_HISTORY:
+                query_map_history.record(name, query_map)
+            changed = (
+                schedule.record(name, query_map, encoded=raw) if schedule else True
+            )
+            return {
+                "map": name,
+                "ok": True,
+                "changed": changed,
+                "attempts": attempt,
+                "seconds": timer.perf_counter() - start,
+            }
+        except Exception as e:
+            error = e
+            print(f"Updating {name} failed (attempt {attempt}): {e}")
+            if attempt <= retries:
+                timer.sleep(min(2**attempt, 30))
+    return {
+        "map": name,
+        "ok": False,
+        "attempts": retries + 1,
+        "seconds": timer.perf_counter() - start,
+        "error": str(error),
+    }
+
+
+def print_refresh_summary(summary, elapsed):
+    for result in sorted(summary, key=lambda r: r["seconds"], reverse=True):
+        status = "ok" if result["ok"] else f"FAILED ({result.get('error')})"
+        print(f"{result['map']:<22} {result['seconds']:8.2f}s  {status}")
+    print(f"Refreshed {len(summary)} query maps in {elapsed:.2f}s")
+
+
+def update_query_maps(
+    parallel=True,
+    max_workers=QUERY_MAP_WORKERS,
+    timeout=QUERY_MAP_TIMEOUT,
+    retries=QUERY_MAP_RETRIES,
+    names=None,
+    schedule=None,
+):
+    names = names or [choice_key.value for choice_key in QUERY_MAP_CHOICES]
+    start = timer.perf_counter()
+    fetchers = targeted_fetchers(names)
+    # A map fetched for keyring addresses only is saved under its own name,
+    # the chain-wide snapshot is left as it was. The schedule tracks it under
+    # that name too, the same one refresh_query_map records it as.
+    names = [
+        keyring_map_name(name) if keyring_map_name(name) in fetchers else name
+        for name in names
+    ]
+    if schedule is not None:
+        names = schedule.due(names)
+    if not parallel:
+        summary = []
+        for name in names:
+            print(f"Updating {name}")
+            summary.append(
+                refresh_query_map(name, retries, schedule, fetchers.get(name))
+            )
+    else:
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="query-map"
+        )
+        futures = {
+            executor.submit(
+                refresh_query_map, name, retries, schedule, fetchers.get(name)
+            ): name
+            for name in names
+        }
+        # Every map gets its own timeout and retries inside refresh_query_map,
+        # this deadline only stops a hung node from blocking the refresh forever.
+        batches = -(-len(names) // max_workers)
+        _, not_done = wait(futures, timeout=timeout * (retries + 1) * batches)
+        summary = [future.result() for future in futures if future not in not_done]
+        summary.extend(
+            {
+                "map": futures[future],
+                "ok": False,
+                "attempts": 0,
+                "seconds": timer.perf_counter() - start,
+                "error": "timed out",
+            }
+            for future in not_done
+        )
+        executor.shutdown(wait=False, cancel_futures=True)
+    stake_sources = {STAKETO_SOURCE, STAKEFROM_SOURCE}
+    if any(r["ok"] and r["changed"] and r["map"] in stake_sources for r in summary):
+        try:
+            update_stake_totals()
+        except FileNotFoundError as e:
+            print(f"Skipping stake totals, missing query map: {e}")
+    # A refresh where every map failed leaves the snapshot time alone, so the
+    # old data keeps reporting its real age and stays stale until a fetch works.
+    if not summary or any(r["ok"] for r in summary):
+        recordtime(changed=any(r["ok"] and r["changed"] for r in summary))
+    else:
+        print("Every query map failed, keeping the previous snapshot time")
+    if BALANCE_BACKEND == "sqlite":
+        balance_index.ensure_current()
+    print_refresh_summary(summary, timer.perf_counter() - start)
+    if schedule is not None:
+        report = schedule.report()
+        print(
+            f"Adaptive schedule: {report['fetches']} fetches, "
+            f"{report['calls_saved']} RPC calls saved"
+        )
     print("Updated")
+    return summary
 
 
-def check_time():
-    time = datetime.now().timestamp()
-    time_path = Path("query_maps/time.json")
-    if not time_path.exists():
-        time_path.write_text('{"time": 0}', encoding="utf-8")
-    with open("query_maps/time.json", "r", encoding="utf-8") as f:
-        oldtime = json.load(f)["time"]
-        print(time)
-        timediff = time - oldtime
-        if timediff > 600:
-            print("Stale query maps, updating")
-            update_query_maps()
-    print("Query maps up to date")
+query_map_schedule = AdaptiveSchedule(baseline_interval=QUERY_MAP_MAX_AGE)
+query_map_refresher = QueryMapRefresher(
+    partial(update_query_maps, schedule=query_map_schedule),
+    schedule=query_map_schedule,
+)
 
 
 def get_query_map(keypath_name: str | QUERY_MAP_CHOICES):
-    check_time()
+    query_map_refresher.ensure_snapshot()
     map_key = str(keypath_name)
-    if map_key.startswith("QUERY_MAP"):
-        query_key = map_key.replace("QUERY_MAP_CHOICES.", "")
-    with open(f"query_maps/{query_key}.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    query_key = map_key.replace("QUERY_MAP_CHOICES.", "")
+    return query_map_store.get(query_key)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+import os
+
+from generate.query_map_store import query_map_store
+
+# "never" refreshes the chain-wide maps only. "auto" fetches keyring
+# addresses only while there are at most TARGETED_FETCH_MAX_ADDRESSES of
+# them, "always" does so regardless of the count.
+TARGETED_FETCH = os.getenv("TARGETED_FETCH", "never")
+
+# Keyring-only subsets are saved under their own names so they never
+# replace the chain-wide maps other readers rely on.
+KEYRING_MAP_PREFIX = "keyring_"
+
+
+def keyring_map_name(name):
+    return f"{KEYRING_MAP_PREFIX}{name}"
+
+
+def keyring_maps(names, store=query_map_store, mode=TARGETED_FETCH):
+    """The keyring subsets of names if all are newer than the full maps, else None."""
+    if mode == "never":
+        return None
+    maps = []
+    for name in names:
+        try:
+            modified = store.modified(keyring_map_name(name))
+        except FileNotFoundError:
+            return None
+        try:
+            if store.modified(name) > modified:
+                return None
+        except FileNotFoundError:
+            pass
+        maps.append(store.get(keyring_map_name(name)))
+    return maps
@@ -1,50 +1,96 @@
-import time
+import os
 import json
+import random
 import asyncio
 from loguru import logger
 
-from data_models import comx
-
+from communex.client import CommuneClient
+
+from generate.client import has_query, run_query
+from generate.schedule import AdaptiveSchedule
+from generate.snapshot import write_snapshot
+
+# Client method names, resolved when a map is fetched.
+ALL_QUERY_MAPS = {
+    "query_map": "query_map",
+    "curator_applications": "query_map_curator_applications",
+    "proposals": "query_map_proposals",
+    "weights": "query_map_weights",
+    "key": "query_map_key",
+    "address": "query_map_address",
+    "emission": "query_map_emission",
+    "pending_emission": "query_map_pending_emission",
+    "subnet_emission": "query_map_subnet_emission",
+    "subnet_consensus": "query_map_subnet_consensus",
+    "incentive": "query_map_incentive",
+    "dividend": "query_map_dividend",
+    "regblock": "query_map_regblock",
+    "lastupdate": "query_map_lastupdate",
+    "stakefrom": "query_map_stakefrom",
+    "staketo": "query_map_staketo",
+    "delegationfee": "query_map_delegationfee",
+    "tempo": "query_map_tempo",
+    "min_allowed_weights": "query_map_min_allowed_weights",
+    "max_allowed_weights": "query_map_max_allowed_weights",
+    "max_allowed_uids": "query_map_max_allowed_uids",
+    "founder": "query_map_founder",
+    "founder_share": "query_map_founder_share",
+    "incentive_ratio": "query_map_incentive_ratio",
+    "trust_ratio": "query_map_trust_ratio",
+    "legit_whitelist": "query_map_legit_whitelist",
+    "subnet_names": "query_map_subnet_names",
+    "balances": "query_map_balances",
+    "registration_blocks": "query_map_registration_blocks",
+    "name": "query_map_name",
+    "subnet_burn": "query_map_subnet_burn",
+}
 
+# Older communex versions lack some of these (query_map_subnet_burn).
 QUERY_MAP = {
-    "query_map": comx.query_map,
-    "curator_applications": comx.query_map_curator_applications,
-    "proposals": comx.query_map_proposals,
-    "weights": comx.query_map_weights,
-    "key": comx.query_map_key,
-    "address": comx.query_map_address,
-    "emission": comx.query_map_emission,
-    "pending_emission": comx.query_map_pending_emission,
-    "subnet_emission": comx.query_map_subnet_emission,
-    "subnet_consensus": comx.query_map_subnet_consensus,
-    "incentive": comx.query_map_incentive,
-    "dividend": comx.query_map_dividend,
-    "regblock": comx.query_map_regblock,
-    "lastupdate": comx.query_map_lastupdate,
-    "stakefrom": comx.query_map_stakefrom,
-    "staketo": comx.query_map_staketo,
-    "delegationfee": comx.query_map_delegationfee,
-    "tempo": comx.query_map_tempo,
-    "min_allowed_weights": comx.query_map_min_allowed_weights,
-    "max_allowed_weights": comx.query_map_max_allowed_weights,
-    "max_allowed_uids": comx.query_map_max_allowed_uids,
-    "founder": comx.query_map_founder,
-    "founder_share": comx.query_map_founder_share,
-    "incentive_ratio": comx.query_map_incentive_ratio,
-    "trust_ratio": comx.query_map_trust_ratio,
-    "legit_whitelist": comx.query_map_legit_whitelist,
-    "subnet_names": comx.query_map_subnet_names,
-    "balances": comx.query_map_balances,
-    "registration_blocks": comx.query_map_registration_blocks,
-    "name": comx.query_map_name,
-    "subnet_burn": comx.query_map_subnet_burn,
+    choice: method for choice, method in ALL_QUERY_MAPS.items() if has_query(method)
 }
 
 QUERY_MAP_CHOICES = list(QUERY_MAP.keys())
 
+QUERY_LOOP_INTERVAL = float(os.getenv("QUERY_LOOP_INTERVAL", 1800))
+QUERY_LOOP_JITTER = float(os.getenv("QUERY_LOOP_JITTER", 0.1))
+QUERY_LOOP_CONCURRENCY = int(os.getenv("QUERY_LOOP_CONCURRENCY", 4))
+
+# Seconds between fetches, maps missing here use QUERY_LOOP_INTERVAL.
+REFRESH_INTERVALS = {
+    "balances": 60,
+    "stakefrom": 60,
+    "staketo": 60,
+    "emission": 60,
+    "pending_emission": 60,
+    "incentive": 300,
+    "dividend": 300,
+    "lastupdate": 300,
+    "weights": 300,
+    "tempo": 3600,
+    "subnet_names": 3600,
+    "founder": 3600,
+    "founder_share": 3600,
+    "max_allowed_uids": 3600,
+    "min_allowed_weights": 3600,
+    "max_allowed_weights": 3600,
+}
+
+
+def parse_intervals(value):
+    """Parse "balances=60,tempo=3600" into {"balances": 60.0, "tempo": 3600.0}."""
+    intervals = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        key, interval = item.split("=")
+        intervals[key.strip()] = float(interval)
+    return intervals
+
+
+REFRESH_INTERVALS.update(parse_intervals(os.getenv("QUERY_LOOP_INTERVALS", "")))
+
 
 def walk_dict(data_dict=None):
-    data_dict = data_dict or comx.__class__.__dict__
+    data_dict = data_dict or CommuneClient.__dict__
     final_dict = {}
     for key, value in data_dict.items():
         logger.debug(key, value.__repr__())
@@ -62,22 +108,102 @@ def walk_dict(data_dict=None):
 
 def get_query_map(query_map_choice):
     logger.info(f"Getting query map: {query_map_choice}")
-    query_map = QUERY_MAP[query_map_choice]()
+    query_map = run_query(QUERY_MAP[query_map_choice])
 
     logger.debug(f"query_map: {query_map}")
-    with open(
-        f"query_maps/query_map_{query_map_choice}.json", "w", encoding="utf-8"
-    ) as f:
-        f.write(json.dumps(query_map, indent=4))
+    write_snapshot("query_maps", f"query_map_{query_map_choice}", query_map)
+    return query_map
+
+
+class QueryMapPoller:
+    """Polls every query map on its own interval without blocking the loop.
+
+    The blocking client calls run in worker threads, at most
+    QUERY_LOOP_CONCURRENCY at a time, so the poller can share the event
+    loop with the FastAPI app.
+    """
+
+    def __init__(
+        self,
+        choices=None,
+        intervals=None,
+        default_interval=QUERY_LOOP_INTERVAL,
+        jitter=QUERY_LOOP_JITTER,
+        max_concurrency=QUERY_LOOP_CONCURRENCY,
+        fetch=get_query_map,
+        schedule=None,
+    ):
+        self.choices = [
+            choice for choice in (choices or QUERY_MAP_CHOICES) if choice != "query_map"
+        ]
+        self.intervals = REFRESH_INTERVALS if intervals is None else intervals
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.fetch = fetch
+        self.schedule = schedule
+        self._tasks = []
+        self._stopped = None
+        self._semaphore = None
+
+    def interval(self, choice):
+        if self.schedule is not None:
+            interval = self.schedule.interval(choice)
+        else:
+            interval = self.intervals.get(choice, self.default_interval)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def poll(self, choice):
+        # Spread the first round so every map does not hit the node at once.
+        await self._sleep(random.uniform(0, self.jitter * self.interval(choice)))
+        while not self._stopped.is_set():
+            try:
+                async with self._semaphore:
+                    query_map = await asyncio.to_thread(self.fetch, choice)
+                if self.schedule is not None:
+                    self.schedule.record(choice, query_map)
+            except Exception as e:
+                logger.error(f"Failed to get query map {choice}: {e}")
+            await self._sleep(self.interval(choice))
+
+    def start(self):
+        self._stopped = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self.poll(choice), name=f"query-map-{choice}")
+            for choice in self.choices
+        ]
+        return self._tasks
+
+    async def stop(self, timeout=30):
+        if self._stopped is None or not self._tasks:
+            return
+        self._stopped.set()
+        # A fetch already running in a thread cannot be interrupted, give it
+        # a chance to finish writing before cancelling what is left.
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def run(self):
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
 
 
 async def get_query_maps():
-    while True:
-        for key in QUERY_MAP_CHOICES:
-            if key == "query_map":
-                continue
-            get_query_map(key)
-        time.sleep(1800)
+    await QueryMapPoller(schedule=AdaptiveSchedule(REFRESH_INTERVALS)).run()
 
 
 REPORT_MAP = {
@@ -0,0 +1,68 @@
+import threading
+from pathlib import Path
+
+from generate.snapshot import find_snapshot, read_snapshot
+
+
+class QueryMapStore:
+    """Process-wide cache of the query map snapshots in query_maps/.
+
+    Each map is parsed once and kept in memory until the file on disk
+    changes (mtime or size) or the store is invalidated after a refresh.
+    """
+
+    def __init__(self, query_map_dir="query_maps"):
+        self.query_map_dir = Path(query_map_dir)
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return find_snapshot(self.query_map_dir, name)
+
+    def _signature(self, path):
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, path):
+        return read_snapshot(path)
+
+    def get(self, name):
+        path = self._path(name)
+        signature = (path.suffix, *self._signature(path))
+        cached = self._maps.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with self._lock:
+            cached = self._maps.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            data = self._load(path)
+            self._maps[name] = (signature, data)
+            return data
+
+    def signature(self, name):
+        """(mtime in ns, size) of the snapshot file for name."""
+        return self._signature(self._path(name))
+
+    def modified(self, name):
+        """mtime in ns of the snapshot file for name."""
+        return self.signature(name)[0]
+
+    def lookup(self, name, key, default=None):
+        return self.get(name).get(key, default)
+
+    def generation(self):
+        try:
+            return self.get("time").get("generation", 0)
+        except FileNotFoundError:
+            return 0
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._maps.clear()
+            else:
+                self._maps.pop(name, None)
+
+
+query_map_store = QueryMapStore()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+
+from loguru import logger
+
+from generate.query_map_store import query_map_store
+
+QUERY_MAP_MAX_AGE = float(os.getenv("QUERY_MAP_MAX_AGE", 600))
+QUERY_MAP_POLL_INTERVAL = float(os.getenv("QUERY_MAP_POLL_INTERVAL", 30))
+
+
+class QueryMapRefresher:
+    """Stale-while-revalidate refresh of the query map snapshot.
+
+    Readers always get the last good snapshot from the store. When it is
+    older than max_age a single background thread runs the refresh; any
+    trigger while it is running joins that refresh instead of starting
+    another one.
+
+    With a schedule, a refresh also starts as soon as any map comes due, so
+    the schedule's per-map intervals take effect and max_age only caps how
+    old the snapshot gets. Maps are checked every poll_interval, which is
+    the effective floor.
+    """
+
+    def __init__(
+        self,
+        refresh,
+        store=query_map_store,
+        max_age=QUERY_MAP_MAX_AGE,
+        poll_interval=QUERY_MAP_POLL_INTERVAL,
+        schedule=None,
+    ):
+        self.refresh = refresh
+        self.schedule = schedule
+        self.store = store
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.last_summary = None
+        self.last_error = None
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._task = None
+        self._stopped = asyncio.Event()
+
+    @property
+    def refreshing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot_time(self):
+        try:
+            return self.store.get("time").get("time", 0)
+        except FileNotFoundError:
+            return 0
+
+    def snapshot_age(self):
+        snapshot_time = self.snapshot_time()
+        if not snapshot_time:
+            return None
+        return datetime.now().timestamp() - snapshot_time
+
+    def is_stale(self):
+        age = self.snapshot_age()
+        if age is None or age > self.max_age:
+            return True
+        next_due = self.schedule.next_due() if self.schedule is not None else None
+        return next_due is not None and next_due <= datetime.now().timestamp()
+
+    def status(self):
+        return {
+            "age": self.snapshot_age(),
+            "max_age": self.max_age,
+            "stale": self.is_stale(),
+            "refreshing": self.refreshing,
+            "generation": self.store.generation(),
+            "last_error": self.last_error,
+        }
+
+    def add_listener(self, listener):
+        """Call listener() on the refresh thread after every successful refresh."""
+        self.listeners.append(listener)
+
+    def _run_refresh(self):
+        try:
+            self.last_summary = self.refresh()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Query map refresh failed: {e}")
+            return
+        for listener in self.listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Query map refresh listener failed: {e}")
+
+    def trigger(self):
+        with self._lock:
+            if self.refreshing:
+                return self._thread
+            self._thread = threading.Thread(
+                target=self._run_refresh, name="query-map-refresh", daemon=True
+            )
+            self._thread.start()
+            return self._thread
+
+    def refresh_if_stale(self):
+        if self.is_stale():
+            logger.info("Stale query maps, refreshing in the background")
+            return self.trigger()
+        return None
+
+    def ensure_snapshot(self):
+        # Only the very first request, with nothing on disk to serve, waits.
+        if self.snapshot_time():
+            self.refresh_if_stale()
+            return
+        self.trigger().join()
+
+    async def run(self):
+        while not self._stopped.is_set():
+            self.refresh_if_stale()
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._stopped = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from data_models import format_as_currency
+from generate.query_map_store import query_map_store
+from generate.reports import REPORT_MAP, report_totals
+from generate.snapshot import write_atomic
+
+REPORTING_POLL_INTERVAL = float(os.getenv("REPORTING_POLL_INTERVAL", 30))
+REPORTING_MIN_INTERVAL = float(os.getenv("REPORTING_MIN_INTERVAL", 300))
+# A total is only re-posted once it moved by at least the absolute amount
+# and, when it was non zero, by at least the relative fraction.
+REPORTING_THRESHOLD = float(os.getenv("REPORTING_THRESHOLD", 0.01))
+REPORTING_THRESHOLD_PCT = float(os.getenv("REPORTING_THRESHOLD_PCT", 0))
+REPORTING_STATE_PATH = os.getenv(
+    "REPORTING_STATE_PATH", "main_reports/reporting_state.json"
+)
+
+
+def changed_totals(old, new, threshold=0.0, threshold_pct=0.0):
+    """Fields of new that moved past the thresholds since old."""
+    changed = {}
+    for field, value in new.items():
+        previous = old.get(field)
+        if previous is None:
+            changed[field] = value
+            continue
+        delta = abs(value - previous)
+        if delta < threshold or delta == 0:
+            continue
+        if previous and delta / abs(previous) < threshold_pct:
+            continue
+        changed[field] = value
+    return changed
+
+
+class ChangeReporter:
+    """Posts report totals when a new query map snapshot changes them.
+
+    Every poll compares the snapshot generation with the one last reported.
+    On a new generation the totals of every report are diffed against what
+    was last delivered and only the changed fields are posted, in a single
+    payload, no more often than min_interval. deliver(payload) must return
+    True only once the payload reached the webhook, a queue that merely
+    accepted it is not enough. Delivered totals are kept in state_path so a
+    restart does not post everything again.
+    """
+
+    def __init__(
+        self,
+        deliver,
+        reports=None,
+        totals=report_totals,
+        store=query_map_store,
+        threshold=REPORTING_THRESHOLD,
+        threshold_pct=REPORTING_THRESHOLD_PCT,
+        min_interval=REPORTING_MIN_INTERVAL,
+        poll_interval=REPORTING_POLL_INTERVAL,
+        state_path=REPORTING_STATE_PATH,
+    ):
+        self.deliver = deliver
+        self.reports = list(reports or REPORT_MAP)
+        self.totals = totals
+        self.store = store
+        self.threshold = threshold
+        self.threshold_pct = threshold_pct
+        self.min_interval = min_interval
+        self.poll_interval = poll_interval
+        self.state_path = Path(state_path) if state_path else None
+        self.generation = None
+        self.last_post = 0.0
+        self.delivered = self._load_state()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _load_state(self):
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text())
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable reporting state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        if self.state_path is not None:
+            write_atomic(self.state_path, json.dumps(self.delivered).encode("utf-8"))
+
+    def changes(self):
+        """Changed totals per report, and the reports that failed to total."""
+        changes, failed = {}, []
+        for name in self.reports:
+            try:
+                totals = self.totals(name)
+            except Exception as e:
+                logger.error(f"Failed to total report {name}: {e}")
+                failed.append(name)
+                continue
+            changed = changed_totals(
+                self.delivered.get(name, {}),
+                totals,
+                self.threshold,
+                self.threshold_pct,
+            )
+            if changed:
+                changes[name] = changed
+        return changes, failed
+
+    def check(self, now=None):
+        """Post changed totals for a new snapshot, return what was posted."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            generation = self.store.generation()
+            if generation == self.generation:
+                return None
+            if self.last_post and now - self.last_post < self.min_interval:
+                # Leave the generation unseen so it is picked up once allowed.
+                return None
+            changes, failed = self.changes()
+            # The generation only counts as seen once every report was
+            # totalled and delivered; otherwise the next poll retries it.
+            if not changes:
+                if not failed:
+                    self.generation = generation
+                return None
+            delivered = self.deliver(
+                {
+                    "generation": generation,
+                    "reports": {
+                        name: {
+                            field: format_as_currency(value)
+                            for field, value in changed.items()
+                        }
+                        for name, changed in changes.items()
+                    },
+                }
+            )
+            if not delivered:
+                logger.error("Delivering changed totals failed, retrying next poll")
+                return None
+            self.last_post = now
+            for name, changed in changes.items():
+                self.delivered.setdefault(name, {}).update(changed)
+            self._save_state()
+            if not failed:
+                self.generation = generation
+            logger.info(f"Reported changed totals for {', '.join(changes)}")
+            return changes
+
+    def run(self, before_check=None):
+        while not self._stopped.is_set():
+            try:
+                if before_check is not None:
+                    before_check()
+                self.check()
+            except Exception as e:
+                logger.error(f"Reporting check failed: {e}")
+            self._stopped.wait(self.poll_interval)
+
+    def stop(self):
+        self._stopped.set()
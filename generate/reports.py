@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+
+from loguru import logger
+
+from generate.balance_engine import build_key_dict
+from generate.get_all_balance import check_keyring, keyring_columns
+from generate.query_map_store import query_map_store
+from wallet.get_key_dict import get_key_dict
+
+REPORT_MAP = {
+    "eden": "main_reports/eden.json",
+    "personal": "main_reports/personal.json",
+    "staff": "main_reports/staff.json",
+    "huck": "main_reports/huck.json",
+}
+
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", 600))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 32))
+REPORT_STREAM_CHUNK = int(os.getenv("REPORT_STREAM_CHUNK", 500))
+
+REPORT_FIELDS = ("key", "name", "balance", "stake", "total", "stake_from")
+
+# Totals table label -> report row field summed for it.
+TOTAL_FIELDS = {
+    "Total Stake From": "stake_from",
+    "Total Balance": "balance",
+    "Total Stake": "stake",
+    "Grand Total": "total",
+}
+
+
+def report_version(name, store=query_map_store):
+    """A report only changes with the query map snapshot or its key file."""
+    key_path = Path(REPORT_MAP[name])
+    mtime = key_path.stat().st_mtime_ns if key_path.exists() else 0
+    return store.generation(), mtime
+
+
+def build_report(name):
+    return check_keyring(REPORT_MAP[name])
+
+
+class ReportCache:
+    """LRU cache of built reports keyed by (report name, snapshot version).
+
+    Entries also expire after ttl seconds. Concurrent misses for the same
+    key wait on one build instead of each building the report.
+    """
+
+    def __init__(
+        self,
+        build=build_report,
+        version=report_version,
+        ttl=REPORT_CACHE_TTL,
+        max_size=REPORT_CACHE_SIZE,
+    ):
+        self.build = build
+        self.version = version
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            built_at, report = entry
+            if time.monotonic() - built_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return report
+
+    def _store(self, key, report):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def peek(self, name):
+        """Return the cached report for the current version without building."""
+        return self._lookup((name, self.version(name)))
+
+    def get(self, name):
+        if name not in REPORT_MAP:
+            raise KeyError(name)
+        key = (name, self.version(name))
+        report = self._lookup(key)
+        if report is not None:
+            self.hits += 1
+            return report
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            report = self._lookup(key)
+            if report is None:
+                self.misses += 1
+                report = self.build(name)
+                self._store(key, report)
+        with self._lock:
+            self._build_locks.pop(key, None)
+        return report
+
+    def warm(self, names=None):
+        for name in names or REPORT_MAP:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Failed to warm report {name}: {e}")
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+report_cache = ReportCache()
+
+
+def get_report(name):
+    return report_cache.get(name)
+
+
+def report_totals(name):
+    report = get_report(name)
+    return {
+        label: sum(row[field] for row in report.values())
+        for label, field in TOTAL_FIELDS.items()
+    }
+
+
+def iter_report_rows(name, chunk_size=REPORT_STREAM_CHUNK):
+    """Yield report rows as they are computed, chunk_size keys at a time.
+
+    Serves from the cached report when there is one, otherwise only one
+    chunk of rows is held in memory at a time.
+    """
+    cached = report_cache.peek(name)
+    if cached is not None:
+        yield from cached.values()
+        return
+    items = iter(get_key_dict(REPORT_MAP[name]).items())
+    while chunk := dict(islice(items, chunk_size)):
+        yield from build_key_dict(chunk, keyring_columns(chunk)).values()
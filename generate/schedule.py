@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Floor for maps that keep changing. Unset (0), a map never drops below the
+# interval it started at, so the schedule can only fetch less often.
+SCHEDULE_MIN_INTERVAL = float(os.getenv("SCHEDULE_MIN_INTERVAL", 0))
+SCHEDULE_MAX_INTERVAL = float(os.getenv("SCHEDULE_MAX_INTERVAL", 6 * 3600))
+SCHEDULE_BACKOFF = float(os.getenv("SCHEDULE_BACKOFF", 2))
+SCHEDULE_SPEEDUP = float(os.getenv("SCHEDULE_SPEEDUP", 0.5))
+# The fixed refresh interval the schedule replaced.
+DEFAULT_BASELINE_INTERVAL = 600
+
+
+def digest_bytes(encoded):
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def digest_query_map(query_map):
+    return digest_bytes(json.dumps(query_map, sort_keys=True, default=str).encode())
+
+
+class MapStats:
+    def __init__(self, interval, floor):
+        self.interval = interval
+        self.floor = floor
+        self.digest = None
+        self.fetches = 0
+        self.changes = 0
+        self.first_fetch = None
+        self.last_fetch = None
+
+    @property
+    def change_rate(self):
+        compared = self.fetches - 1
+        return self.changes / compared if compared > 0 else 0.0
+
+
+class AdaptiveSchedule:
+    """Per-map refresh intervals driven by how often each map changes.
+
+    Each map starts at its entry in intervals, or at baseline_interval, the
+    fixed interval the maps would otherwise be refreshed on. A map that came
+    back unchanged has its interval multiplied by backoff, a map that
+    changed has it multiplied by speedup, both clamped to [floor,
+    max_interval]. The floor is min_interval when set, otherwise the map's
+    starting interval. report() counts calls saved against baseline_interval,
+    negative when the schedule fetched more often.
+    """
+
+    def __init__(
+        self,
+        intervals=None,
+        min_interval=SCHEDULE_MIN_INTERVAL,
+        max_interval=SCHEDULE_MAX_INTERVAL,
+        backoff=SCHEDULE_BACKOFF,
+        speedup=SCHEDULE_SPEEDUP,
+        baseline_interval=None,
+    ):
+        self.intervals = intervals or {}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.speedup = speedup
+        self.baseline_interval = (
+            baseline_interval or min_interval or DEFAULT_BASELINE_INTERVAL
+        )
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _clamp(self, interval, floor):
+        return min(self.max_interval, max(floor, interval))
+
+    def stats(self, name):
+        if name not in self._stats:
+            initial = self.intervals.get(name, self.baseline_interval)
+            floor = self.min_interval or initial
+            self._stats[name] = MapStats(self._clamp(initial, floor), floor)
+        return self._stats[name]
+
+    def interval(self, name):
+        with self._lock:
+            return self.stats(name).interval
+
+    def due(self, names, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                name
+                for name in names
+                if self.stats(name).last_fetch is None
+                or now - self.stats(name).last_fetch >= self.stats(name).interval
+            ]
+
+    def next_due(self):
+        """Earliest time a fetched map comes due again, None before any fetch."""
+        with self._lock:
+            due = [
+                stats.last_fetch + stats.interval
+                for stats in self._stats.values()
+                if stats.last_fetch is not None
+            ]
+        return min(due, default=None)
+
+    def record(self, name, query_map, now=None, encoded=None):
+        """Record a fetch and return True if the map differs from the last one.
+
+        Pass the snapshot bytes that were written as encoded to hash those
+        instead of serializing the whole map again.
+        """
+        now = time.time() if now is None else now
+        if encoded is not None:
+            digest = digest_bytes(encoded)
+        else:
+            digest = digest_query_map(query_map)
+        with self._lock:
+            stats = self.stats(name)
+            changed = digest != stats.digest
+            if stats.digest is not None:
+                factor = self.speedup if changed else self.backoff
+                stats.interval = self._clamp(stats.interval * factor, stats.floor)
+                stats.changes += changed
+            stats.digest = digest
+            stats.fetches += 1
+            if stats.first_fetch is None:
+                stats.first_fetch = now
+            stats.last_fetch = now
+            return changed
+
+    def report(self, now=None):
+        now = time.time() if now is None else now
+        maps = {}
+        with self._lock:
+            for name, stats in self._stats.items():
+                if not stats.fetches:
+                    continue
+                elapsed = now - stats.first_fetch
+                baseline_calls = int(elapsed // self.baseline_interval) + 1
+                maps[name] = {
+                    "interval": stats.interval,
+                    "fetches": stats.fetches,
+                    "changes": stats.changes,
+                    "change_rate": round(stats.change_rate, 3),
+                    "calls_saved": baseline_calls - stats.fetches,
+                }
+        return {
+            "maps": maps,
+            "fetches": sum(m["fetches"] for m in maps.values()),
+            "calls_saved": sum(m["calls_saved"] for m in maps.values()),
+        }
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SNAPSHOT_FORMAT = os.getenv("SNAPSHOT_FORMAT", "json")
+
+SNAPSHOT_SUFFIXES = {"json": ".json", "msgpack": ".msgpack"}
+
+# msgpack stops at 64-bit integers, substrate account data has u128 fields.
+BIG_INT_EXT = 1
+INT64_MIN = -(2**63)
+UINT64_MAX = 2**64 - 1
+
+
+def _msgpack_ready(data):
+    # JSON turns every map key into a string; do the same for msgpack so
+    # readers get identical data whichever format is on disk.
+    if isinstance(data, dict):
+        return {str(key): _msgpack_ready(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_msgpack_ready(value) for value in data]
+    if isinstance(data, int) and not INT64_MIN <= data <= UINT64_MAX:
+        return msgpack.ExtType(BIG_INT_EXT, str(data).encode("ascii"))
+    return data
+
+
+def _msgpack_ext_hook(code, payload):
+    if code == BIG_INT_EXT:
+        return int(payload.decode("ascii"))
+    return msgpack.ExtType(code, payload)
+
+
+def encode_snapshot(data, fmt=SNAPSHOT_FORMAT):
+    if fmt == "json":
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise ValueError("SNAPSHOT_FORMAT=msgpack needs the msgpack package")
+        return msgpack.packb(_msgpack_ready(data), use_bin_type=True)
+    raise ValueError(f"Unknown snapshot format {fmt}")
+
+
+def decode_snapshot(raw, suffix):
+    if suffix == ".msgpack":
+        if msgpack is None:
+            raise ValueError("Reading .msgpack snapshots needs the msgpack package")
+        return msgpack.unpackb(raw, raw=False, ext_hook=_msgpack_ext_hook)
+    return json.loads(raw)
+
+
+def snapshot_path(directory, name, fmt=SNAPSHOT_FORMAT):
+    return Path(directory) / f"{name}{SNAPSHOT_SUFFIXES[fmt]}"
+
+
+def find_snapshot(directory, name, fmt=SNAPSHOT_FORMAT):
+    """Return the snapshot file for name, preferring the configured format."""
+    preferred = snapshot_path(directory, name, fmt)
+    if preferred.exists():
+        return preferred
+    for suffix in set(SNAPSHOT_SUFFIXES.values()) - {preferred.suffix}:
+        path = Path(directory) / f"{name}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No snapshot for {name} in {directory}")
+
+
+def write_atomic(path, raw):
+    """Write raw bytes to path so readers only ever see a complete file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def write_snapshot(directory, name, data, fmt=SNAPSHOT_FORMAT):
+    return write_encoded_snapshot(directory, name, encode_snapshot(data, fmt), fmt)
+
+
+def write_encoded_snapshot(directory, name, raw, fmt=SNAPSHOT_FORMAT):
+    """Write bytes from encode_snapshot(data, fmt) as the snapshot for name."""
+    path = write_atomic(snapshot_path(directory, name, fmt), raw)
+    # Drop a stale copy in the other format so find_snapshot cannot pick it.
+    for suffix in set(SNAPSHOT_SUFFIXES.values()) - {path.suffix}:
+        (path.parent / f"{name}{suffix}").unlink(missing_ok=True)
+    return path
+
+
+def read_snapshot(path):
+    path = Path(path)
+    return decode_snapshot(path.read_bytes(), path.suffix)
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from generate.snapshot import find_snapshot, read_snapshot, write_snapshot
+
+# Opt-in: history adds a diff and a second write per map on every refresh.
+SNAPSHOT_HISTORY = os.getenv("SNAPSHOT_HISTORY", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+SNAPSHOT_HISTORY_DIR = os.getenv("SNAPSHOT_HISTORY_DIR", "query_maps/history")
+SNAPSHOT_HISTORY_MAX_DELTAS = int(os.getenv("SNAPSHOT_HISTORY_MAX_DELTAS", 288))
+# Deltas allowed past max_deltas before record() compacts, so the base is
+# rewritten once per batch instead of on every refresh.
+SNAPSHOT_HISTORY_COMPACT_SLACK = int(os.getenv("SNAPSHOT_HISTORY_COMPACT_SLACK", 48))
+
+_MISSING = object()
+
+
+def diff_query_maps(old, new):
+    """Top level keys added, removed or changed between two snapshots."""
+    added = {key: value for key, value in new.items() if key not in old}
+    removed = [key for key in old if key not in new]
+    changed = {
+        key: value for key, value in new.items() if key in old and old[key] != value
+    }
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def apply_delta(data, delta):
+    for key in delta["removed"]:
+        data.pop(key, None)
+    data.update(delta["added"])
+    data.update(delta["changed"])
+    return data
+
+
+class SnapshotHistory:
+    """Versioned query map history stored as one full base plus deltas.
+
+    history/<map>/base     {"version", "time", "data"}
+    history/<map>/<v>      {"version", "time", "added", "removed", "changed"}
+    history/<map>/index    {"base", "versions": [[version, time], ...]}
+
+    Any recorded version can be rebuilt by replaying deltas over the base.
+    compact() folds the oldest deltas into the base to bound disk use;
+    record() does so only once compact_slack deltas past max_deltas have
+    piled up.
+    """
+
+    def __init__(
+        self,
+        history_dir=SNAPSHOT_HISTORY_DIR,
+        max_deltas=SNAPSHOT_HISTORY_MAX_DELTAS,
+        compact_slack=SNAPSHOT_HISTORY_COMPACT_SLACK,
+    ):
+        self.history_dir = Path(history_dir)
+        self.max_deltas = max_deltas
+        self.compact_slack = compact_slack
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, name):
+        return self.history_dir / name
+
+    def _read(self, name, entry, default=_MISSING):
+        try:
+            return read_snapshot(find_snapshot(self._dir(name), entry))
+        except FileNotFoundError:
+            if default is _MISSING:
+                raise
+            return default
+
+    def index(self, name):
+        return self._read(name, "index", {"base": None, "versions": []})
+
+    def versions(self, name):
+        return [tuple(version) for version in self.index(name)["versions"]]
+
+    def _version_at(self, name, at):
+        candidates = [v for v, t in self.versions(name) if t <= at]
+        if not candidates:
+            raise KeyError(f"No {name} snapshot recorded at or before {at}")
+        return candidates[-1]
+
+    def _deltas(self, name, index, version):
+        for delta_version, _ in index["versions"]:
+            if index["base"] < delta_version <= version:
+                yield self._read(name, str(delta_version))
+
+    def rebuild(self, name, version=None, at=None):
+        """Return the map as it was at version, or at a unix time."""
+        index = self.index(name)
+        if index["base"] is None:
+            raise KeyError(f"No history recorded for {name}")
+        if at is not None:
+            version = self._version_at(name, at)
+        version = index["versions"][-1][0] if version is None else version
+        if version < index["base"]:
+            raise KeyError(f"{name} version {version} was compacted away")
+        data = self._read(name, "base")["data"]
+        for delta in self._deltas(name, index, version):
+            apply_delta(data, delta)
+        return data
+
+    def value_at(self, name, key, version=None, at=None, default=None):
+        """Return a single key's value without rebuilding the whole map."""
+        index = self.index(name)
+        if index["base"] is None:
+            return default
+        if at is not None:
+            version = self._version_at(name, at)
+        version = index["versions"][-1][0] if version is None else version
+        value = self._read(name, "base")["data"].get(key, default)
+        for delta in self._deltas(name, index, version):
+            if key in delta["removed"]:
+                value = default
+            value = delta["added"].get(key, delta["changed"].get(key, value))
+        return value
+
+    def record(self, name, query_map, time=None):
+        """Store query_map as a new version, return it or None if unchanged."""
+        time = datetime.now().timestamp() if time is None else time
+        # Compare in the same shape the snapshot files hold (string keys, lists).
+        data = json.loads(json.dumps(query_map))
+        with self._lock:
+            index = self.index(name)
+            if index["base"] is None:
+                version = 1
+                write_snapshot(
+                    self._dir(name),
+                    "base",
+                    {"version": version, "time": time, "data": data},
+                )
+                index = {"base": version, "versions": [[version, time]]}
+            else:
+                latest = self._latest.get(name)
+                if latest is None:
+                    latest = self.rebuild(name)
+                delta = diff_query_maps(latest, data)
+                if not any(delta.values()):
+                    self._latest[name] = data
+                    return None
+                version = index["versions"][-1][0] + 1
+                write_snapshot(
+                    self._dir(name),
+                    str(version),
+                    {"version": version, "time": time, **delta},
+                )
+                index["versions"].append([version, time])
+            write_snapshot(self._dir(name), "index", index)
+            self._latest[name] = data
+            deltas = len(index["versions"]) - 1
+            if deltas > self.max_deltas + self.compact_slack:
+                self._compact(name, index, deltas - self.max_deltas)
+            return version
+
+    def _compact(self, name, index, count):
+        new_base = index["versions"][count][0]
+        base = self._read(name, "base")
+        data = base["data"]
+        for delta in self._deltas(name, index, new_base):
+            apply_delta(data, delta)
+        new_base_time = index["versions"][count][1]
+        write_snapshot(
+            self._dir(name),
+            "base",
+            {"version": new_base, "time": new_base_time, "data": data},
+        )
+        dropped = [version for version, _ in index["versions"][1 : count + 1]]
+        index["base"] = new_base
+        index["versions"] = index["versions"][count:]
+        write_snapshot(self._dir(name), "index", index)
+        for version in dropped:
+            try:
+                find_snapshot(self._dir(name), str(version)).unlink()
+            except FileNotFoundError:
+                pass
+
+    def compact(self, name, keep=None):
+        """Fold all but the newest keep deltas into the base snapshot."""
+        keep = self.max_deltas if keep is None else keep
+        with self._lock:
+            index = self.index(name)
+            count = len(index["versions"]) - 1 - keep
+            if index["base"] is not None and count > 0:
+                self._compact(name, index, count)
+
+
+query_map_history = SnapshotHistory()
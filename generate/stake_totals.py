@@ -0,0 +1,57 @@
+from generate.query_map_store import query_map_store
+from generate.snapshot import write_snapshot
+
+# Query maps the aggregates are built from. update_query_maps() stores
+# comx.query_map_staketo under "total_stake".
+STAKETO_SOURCE = "total_stake"
+STAKEFROM_SOURCE = "stakefrom"
+STAKE_TOTALS = "stake_totals"
+
+
+def summarize_stakes(stake_list):
+    amounts = [stake[1] for stake in stake_list]
+    return sum(amounts), len(amounts), max(amounts, default=0)
+
+
+def build_stake_totals(staketo_map, stakefrom_map):
+    """Per-address stake aggregates.
+
+    A direction's fields are None when the address is missing from that
+    map, so readers can tell "no entry" from "entry with nothing staked".
+    """
+    empty = {
+        "staketo": None,
+        "staketo_count": None,
+        "largest_staketo": None,
+        "stakefrom": None,
+        "stakefrom_count": None,
+        "largest_stakefrom": None,
+    }
+    totals = {}
+    for direction, query_map in (
+        ("staketo", staketo_map),
+        ("stakefrom", stakefrom_map),
+    ):
+        for address, stake_list in query_map.items():
+            total, count, largest = summarize_stakes(stake_list)
+            entry = totals.setdefault(address, dict(empty))
+            entry[direction] = total
+            entry[f"{direction}_count"] = count
+            entry[f"largest_{direction}"] = largest
+    return totals
+
+
+def update_stake_totals(query_map_dir="query_maps", store=query_map_store):
+    stake_totals = build_stake_totals(
+        store.get(STAKETO_SOURCE), store.get(STAKEFROM_SOURCE)
+    )
+    write_snapshot(query_map_dir, STAKE_TOTALS, stake_totals)
+    return stake_totals
+
+
+def get_stake_totals(store=query_map_store):
+    """The persisted aggregates, or None when they have not been built yet."""
+    try:
+        return store.get(STAKE_TOTALS)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,4 @@
+import time
+
+# Imported first by main.py, so cold start timings include the app's imports.
+STARTED_AT = time.perf_counter()
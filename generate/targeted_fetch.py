@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from loguru import logger
+
+from generate.client import COMX_NUM_CONNECTIONS, client_pool
+from generate.keyring_maps import TARGETED_FETCH, keyring_map_name
+from generate.reports import REPORT_MAP
+from wallet.key_index import key_index
+
+TARGETED_FETCH_MAX_ADDRESSES = int(os.getenv("TARGETED_FETCH_MAX_ADDRESSES", 2000))
+TARGETED_FETCH_CHUNK = int(os.getenv("TARGETED_FETCH_CHUNK", 250))
+
+# Query map snapshot name -> (pallet, storage function).
+TARGETED_MAPS = {
+    "balances": ("System", "Account"),
+    "total_stake": ("SubspaceModule", "StakeTo"),
+    "stakefrom": ("SubspaceModule", "StakeFrom"),
+}
+
+
+def keyring_addresses(key_paths=None):
+    """Union of the addresses in every report keyring that exists."""
+    return sorted(key_index.union(key_paths or REPORT_MAP.values()))
+
+
+def use_targeted_fetch(addresses, mode=TARGETED_FETCH):
+    if mode == "never" or not addresses:
+        return False
+    if mode == "always":
+        return True
+    return len(addresses) <= TARGETED_FETCH_MAX_ADDRESSES
+
+
+def latest_block_hash(client):
+    with client.get_conn(init=True) as substrate:
+        return substrate.get_block_hash()
+
+
+def fetch_accounts(client, addresses, block_hash=None, chunk_size=TARGETED_FETCH_CHUNK):
+    """System.Account for each address, chunk_size storage keys per query_multi."""
+    accounts = {}
+    with client.get_conn(init=True) as substrate:
+        for start in range(0, len(addresses), chunk_size):
+            storage_keys = [
+                substrate.create_storage_key("System", "Account", [address])
+                for address in addresses[start : start + chunk_size]
+            ]
+            for storage_key, account in substrate.query_multi(
+                storage_keys, block_hash=block_hash
+            ):
+                accounts[storage_key.params[0]] = account.value
+    return accounts
+
+
+def fetch_stakes(client, storage, addresses, block_hash=None, workers=None):
+    """Prefix query of a stake double map for each address.
+
+    Each address is its own query_map call: query_batch_map keys prefix
+    results by the second map key only, so addresses batched into one call
+    would overwrite each other.
+    """
+
+    def fetch(address):
+        result = client.query_map(
+            storage, [address], extract_value=False, block_hash=block_hash
+        )
+        return address, list(result.get(storage, {}).items())
+
+    workers = workers or COMX_NUM_CONNECTIONS
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stake") as pool:
+        return {
+            address: stakes for address, stakes in pool.map(fetch, addresses) if stakes
+        }
+
+
+def fetch_with_client(client, name, addresses):
+    block_hash = latest_block_hash(client)
+    if name == "balances":
+        return fetch_accounts(client, addresses, block_hash)
+    _, storage = TARGETED_MAPS[name]
+    return fetch_stakes(client, storage, addresses, block_hash)
+
+
+def fetch_targeted_map(name, addresses, pool=client_pool):
+    """Fetch the keyring subset of a TARGETED_MAPS query map, same shape as the full map.
+
+    Runs through the node pool, so it fails over and shows up in its metrics.
+    """
+    return pool.run(
+        partial(fetch_with_client, name=name, addresses=addresses),
+        label=f"targeted {name}",
+    )
+
+
+def targeted_fetchers(names, mode=TARGETED_FETCH):
+    """{keyring map name: fetch()} for the maps to pull by address.
+
+    Empty for a full refresh. The subsets are saved as keyring_<name>, see
+    generate.keyring_maps.
+    """
+    targeted = [name for name in names if name in TARGETED_MAPS]
+    if not targeted:
+        return {}
+    addresses = keyring_addresses()
+    if not use_targeted_fetch(addresses, mode):
+        if mode != "never":
+            logger.info(f"{len(addresses)} keyring addresses, fetching full maps")
+        return {}
+    logger.info(f"Fetching {', '.join(targeted)} for {len(addresses)} addresses")
+    return {
+        keyring_map_name(name): partial(fetch_targeted_map, name, addresses)
+        for name in targeted
+    }
@@ -1,6 +1,8 @@
+from generate.startup import STARTED_AT
+
 import os
+import time
 import json
-import requests
 import asyncio
 import uvicorn
 from fastapi import FastAPI, Request, Response, HTTPException
@@ -13,16 +15,29 @@ from dotenv import load_dotenv
 
 from routes.data_table import get_data, router as data_router
 from routes.total_table import get_table_data, router as total_router
-from generate.get_query_maps import get_query_map
-from generate.get_all_balance import check_keyring
-
+from routes.reports_api import router as reports_router
+from generate.get_query_maps import get_query_map, query_map_refresher
+from generate.reports import get_report, report_cache
+from generate.delivery import delivery_for, delivery_stats, stop_deliveries
+from generate.client import NODE_HEALTH_INTERVAL, client_pool
+from validation.weight_stats import weight_monitor
+from data_models import URL
 
 templates = Jinja2Templates("./templates")
 
+RUN_QUERY_LOOP = os.getenv("RUN_QUERY_LOOP", "false").lower() in ("1", "true", "yes")
+# "background" serves the cached snapshots at once and builds reports after
+# startup, "blocking" builds them before the server accepts requests.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+query_map_poller = None
+startup_report_task = None
+startup_timings = {"imported": round(time.perf_counter() - STARTED_AT, 3)}
+
 app = FastAPI()
 
 app.include_router(data_router)
 app.include_router(total_router)
+app.include_router(reports_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,24 +48,66 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    response = await call_next(request)
+    if "first_request" not in startup_timings:
+        startup_timings["first_request"] = round(time.perf_counter() - STARTED_AT, 3)
+        logger.info(f"Cold start timings (seconds since launch): {startup_timings}")
+    return response
+
+
 @app.on_event("startup")
 async def startup():
     logger.info("Startup")
-    keyring = check_keyring("main_reports/eden.json")
+    query_map_refresher.add_listener(report_cache.warm)
+    # Builds each new weights snapshot once and tracks boosted miners on it.
+    query_map_refresher.add_listener(weight_monitor.observe_store)
+    query_map_refresher.start()
+    client_pool.start_health_checks(NODE_HEALTH_INTERVAL)
+    if RUN_QUERY_LOOP:
+        from generate.query_loop import QueryMapPoller
+
+        global query_map_poller
+        query_map_poller = QueryMapPoller()
+        query_map_poller.start()
+    if STARTUP_MODE == "blocking":
+        await asyncio.to_thread(post_startup_report)
+    else:
+        # The loop only keeps a weak reference to tasks, hold on to it here.
+        global startup_report_task
+        startup_report_task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(post_startup_report)
+        )
+    startup_timings["startup"] = round(time.perf_counter() - STARTED_AT, 3)
+    logger.info(f"Accepting requests {startup_timings['startup']}s after launch")
+
+
+def post_startup_report():
+    report_cache.warm()
+    try:
+        keyring = get_report("eden")
+    except Exception as e:
+        logger.error(f"Failed to build startup report: {e}")
+        return
+    startup_timings["reports_built"] = round(time.perf_counter() - STARTED_AT, 3)
     logger.info(keyring)
-    return post_data(keyring)
+    post_data(keyring)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    logger.info("Shutdown")
+    await query_map_refresher.stop()
+    client_pool.stop_health_checks()
+    if query_map_poller is not None:
+        await query_map_poller.stop()
+    await asyncio.to_thread(stop_deliveries)
 
 
 def post_data(data):
     logger.info(data)
-    try:
-        response = requests.post(URL, json=data, timeout=30)
-        if response.status_code == 200:
-            return response.json()
-    except HTTPException as e:
-        print("Error posting data to webhook.io: {e}\n{markdown_data}")
-        raise HTTPException("Failed to post data to webhook.io") from e
-    return HTTPException("Failed to post data to webhook.io")
+    return delivery_for(URL).enqueue(data)
 
 
 HOST = os.getenv("HOST", "127.0.0.1")
@@ -69,5 +126,34 @@ async def main(request: Request):
         ) from e
 
 
+@app.get("/query-maps/status")
+async def query_maps_status():
+    return query_map_refresher.status()
+
+
+@app.get("/startup/timings")
+async def startup_status():
+    return startup_timings
+
+
+@app.get("/nodes/status")
+async def nodes_status():
+    return client_pool.metrics()
+
+
+@app.get("/weights/boosted")
+async def weights_boosted():
+    return {
+        "snapshot": weight_monitor.snapshot_key,
+        "snapshots": weight_monitor.snapshots,
+        "boosted_miners": weight_monitor.boosted_miners(),
+    }
+
+
+@app.get("/webhooks/status")
+async def webhooks_status():
+    return delivery_stats()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host=HOST, port=PORT)
@@ -1,8 +1,15 @@
-import requests
-from routes.total_table import get_table_data, post_data
-from routes.data_table import get_data, 
+from data_models import URL
+from generate.delivery import delivery_for, stop_deliveries
+from generate.get_query_maps import query_map_refresher
+from generate.reporting import ChangeReporter
 
-while True:
-    data = get_data()
-    table_data = get_table_data()
-    post_data(table_data)
\ No newline at end of file
+if __name__ == "__main__":
+    # Sent synchronously, totals only count as delivered once the post succeeded.
+    reporter = ChangeReporter(delivery_for(URL).send)
+    try:
+        # Keep the snapshot fresh, the reporter posts when it changes.
+        reporter.run(before_check=query_map_refresher.refresh_if_stale)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_deliveries()
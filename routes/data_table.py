@@ -1,8 +1,8 @@
-import json
 import http
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
-from generate.get_all_balance import get_balances, check_keyring
+from generate.reports import REPORT_MAP, get_report
 from loguru import logger
 
 
@@ -11,33 +11,23 @@ templates = Jinja2Templates(directory="component_library/templates")
 
 
 @router.get("/data-table")
-async def data_table(request: Request):
+async def data_table(request: Request, report_selection: str = "eden"):
     logger.info("Loading data table...")
-    data = get_data(request)
+    # Report generation is blocking file and CPU work, keep it off the loop.
+    data = await run_in_threadpool(get_data, report_selection)
     return templates.TemplateResponse(
         "components/data_table.html", {"request": request, "data": data}
     )
 
 
-REPORT_MAP = {
-    "eden": "main_reports/eden.json",
-    "personal": "main_reports/personal.json",
-    "staff": "main_reports/staff.json",
-    "huck": "main_reports/huck.json",
-}
-
-
 def get_data(reportSelection: str = "eden"):
     logger.info("Loading data...")
-    report_path = REPORT_MAP[reportSelection]
-    check_keyring(report_path)
-    with open("main_reports/keyring.json", "r", encoding="utf-8") as f:
-        json_data = f.read()
-    data_dict = json.loads(json_data)
+    if reportSelection not in REPORT_MAP:
+        raise HTTPException(status_code=404, detail="Report not found")
     try:
-        return get_balances(data_dict)
+        return get_report(reportSelection)
     except HTTPException as e:
-        logger.error(f"Error loading data: {e}\n{data_dict}")
+        logger.error(f"Error loading data: {e}\n{REPORT_MAP[reportSelection]}")
         raise HTTPException(
             {"status_code": 500, "message": "Error loading data"}
         ) from e
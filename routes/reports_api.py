@@ -0,0 +1,80 @@
+import json
+from itertools import islice
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+from generate.reports import REPORT_FIELDS, REPORT_MAP, get_report, iter_report_rows
+
+router = APIRouter(prefix="/api/reports")
+
+
+def parse_fields(fields):
+    if not fields:
+        return REPORT_FIELDS
+    selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = set(selected) - set(REPORT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return selected
+
+
+def parse_sort(sort):
+    field = sort.lstrip("-")
+    if field not in REPORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field: {field}")
+    return field, sort.startswith("-")
+
+
+def select_rows(report_name, offset, limit, sort, fields):
+    if sort:
+        # Sorting needs every row, take them from the cached report.
+        field, descending = parse_sort(sort)
+        rows = sorted(
+            get_report(report_name).values(),
+            key=lambda row: row[field],
+            reverse=descending,
+        )
+    else:
+        rows = iter_report_rows(report_name)
+    stop = None if limit is None else offset + limit
+    for row in islice(rows, offset, stop):
+        yield {field: row[field] for field in fields}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def json_array_chunks(rows):
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(row)
+    yield "]"
+
+
+@router.get("/{report_name}")
+def stream_report(
+    report_name: str,
+    format: str = "ndjson",
+    offset: int = 0,
+    limit: int | None = None,
+    sort: str | None = None,
+    fields: str | None = None,
+):
+    logger.info(f"Streaming report {report_name}...")
+    if report_name not in REPORT_MAP:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset and limit must be >= 0")
+    if sort:
+        parse_sort(sort)
+    rows = select_rows(report_name, offset, limit, sort, parse_fields(fields))
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(rows), media_type="application/x-ndjson")
+    if format == "json":
+        return StreamingResponse(json_array_chunks(rows), media_type="application/json")
+    raise HTTPException(status_code=400, detail="format must be ndjson or json")
@@ -1,7 +1 @@
-from communex.client import CommuneClient
-from communex._common import get_node_url
-
-comx = CommuneClient(get_node_url())
-
-
 command_dict = {}
@@ -0,0 +1,135 @@
+import os
+import random
+import unittest
+from tempfile import TemporaryDirectory
+
+from generate.balance_engine import (
+    balance_columns,
+    build_key_dict,
+    compute_key_dict,
+    raw_columns_from_rows,
+)
+from generate.get_all_balance import get_balances
+from generate.query_map_store import query_map_store
+from generate.snapshot import write_snapshot
+from generate.stake_totals import STAKEFROM_SOURCE, STAKETO_SOURCE
+
+
+def synthetic_maps(keys, chain_keys, seed=0):
+    rng = random.Random(seed)
+    addresses = [f"5{i:047d}" for i in range(chain_keys)]
+    balances = {
+        address: {"data": {"free": rng.randint(0, 10**16)}}
+        for address in addresses
+        if rng.random() < 0.9
+    }
+    staketo = {
+        address: [
+            [rng.choice(addresses), rng.randint(0, 10**15)]
+            for _ in range(rng.randint(0, 8))
+        ]
+        for address in addresses
+        if rng.random() < 0.5
+    }
+    stakefrom = {
+        address: [
+            [rng.choice(addresses), rng.randint(0, 10**15)]
+            for _ in range(rng.randint(0, 30))
+        ]
+        for address in addresses
+        if rng.random() < 0.2
+    }
+    key_data = {
+        address: {"key": address, "name": f"key_{i}"}
+        for i, address in enumerate(rng.sample(addresses, keys))
+    }
+    return key_data, balances, staketo, stakefrom
+
+
+def loop_key_dict(key_data, balances, staketo_map, stakefrom_map):
+    """The original get_balances() arithmetic, without the printing."""
+    key_dict = {}
+    for ss58key, value in key_data.items():
+        balance = staketo = stakefrom = 0
+        if ss58key in balances:
+            balance = round(balances[ss58key]["data"]["free"] / 1_000_000_000, 2) or 0
+        if ss58key in staketo_map:
+            raw = sum(stake[1] for stake in staketo_map[ss58key])
+            staketo = round(raw / 1_000_000_000, 2) or 0
+        if ss58key in stakefrom_map:
+            raw = sum(stake[1] for stake in stakefrom_map[ss58key])
+            stakefrom = round(raw / 1_000_000_000, 2) or 0
+        total = round(balance + staketo, 2) or 0
+        key_dict[ss58key] = {
+            "key": ss58key,
+            "name": value["name"],
+            "balance": balance,
+            "stake": staketo,
+            "total": total,
+            "stake_from": stakefrom,
+        }
+    return key_dict
+
+
+class TestBalanceEngine(unittest.TestCase):
+    def test_matches_per_key_loop(self):
+        maps = synthetic_maps(2000, 5000, seed=1)
+        assert compute_key_dict(*maps) == loop_key_dict(*maps)
+
+    def test_missing_and_empty_entries(self):
+        key_data = {"5A": {"name": "a"}, "5B": {"name": "b"}, "5C": {"name": "c"}}
+        balances = {"5A": {"data": {"free": 1_234_567_890}}}
+        staketo = {"5A": [["5M", 2_000_000_000], ["5N", 5_000_000]], "5B": []}
+        stakefrom = {"5C": [["5A", 3_000_000_000]]}
+        key_dict = compute_key_dict(key_data, balances, staketo, stakefrom)
+        assert key_dict["5A"] == {
+            "key": "5A",
+            "name": "a",
+            "balance": 1.23,
+            "stake": 2.0,
+            "total": 3.23,
+            "stake_from": 0,
+        }
+        assert key_dict["5B"]["total"] == 0
+        assert key_dict["5C"]["stake_from"] == 3.0
+
+    def test_rounds_like_python(self):
+        amounts = [12_345_000_000, 1_005_000_000, 2_675_000_000, 10_125_000]
+        key_data = {f"5{i}": {"name": str(i)} for i in range(len(amounts))}
+        balances = {
+            f"5{i}": {"data": {"free": amount}} for i, amount in enumerate(amounts)
+        }
+        key_dict = compute_key_dict(key_data, balances, {}, {})
+        for i, amount in enumerate(amounts):
+            expected = round(amount / 1_000_000_000, 2)
+            assert key_dict[f"5{i}"]["balance"] == expected
+
+    def test_rows_give_same_result(self):
+        key_data = {"5A": {"name": "a"}, "5B": {"name": "b"}}
+        rows = {"5A": (1_234_567_890, 2_005_000_000, None)}
+        columns = balance_columns(raw_columns_from_rows(list(key_data), rows))
+        key_dict = build_key_dict(key_data, columns)
+        # 2.005 is stored just below 2.005, round() gives 2.0 and so must we.
+        assert key_dict["5A"]["stake"] == round(2_005_000_000 / 1_000_000_000, 2)
+        assert key_dict["5A"]["total"] == 3.23
+        assert key_dict["5B"]["balance"] == 0
+
+    def test_get_balances_reads_the_saved_staketo_map(self):
+        maps = {
+            "balances": {"5A": {"data": {"free": 1_000_000_000}}},
+            STAKETO_SOURCE: {"5A": [["5M", 2_000_000_000]]},
+            STAKEFROM_SOURCE: {"5M": [["5A", 2_000_000_000]]},
+        }
+        cwd = os.getcwd()
+        with TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                query_map_store.invalidate()
+                for name, query_map in maps.items():
+                    write_snapshot("query_maps", name, query_map)
+                key_dict = get_balances({"5A": {"name": "a"}})
+                assert key_dict["5A"]["stake"] == 2.0
+                assert key_dict["5A"]["total"] == 3.0
+            finally:
+                os.chdir(cwd)
+                query_map_store.invalidate()
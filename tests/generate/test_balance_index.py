@@ -0,0 +1,75 @@
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from generate.balance_index import BalanceIndex
+from generate import get_query_maps
+from generate.query_map_store import QueryMapStore
+
+
+class TestBalanceIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.write(
+            "balances", {"5A": {"data": {"free": 10}}, "5B": {"data": {"free": 5}}}
+        )
+        self.write("total_stake", {"5A": [["5M", 3], ["5N", 4]], "5C": []})
+        self.write("stakefrom", {"5M": [["5A", 3]]})
+        self.write("time", {"time": 1.0, "generation": 1})
+        self.index = BalanceIndex(self.path / "index.sqlite", QueryMapStore(self.path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        (self.path / f"{name}.json").write_text(json.dumps(data), encoding="utf-8")
+
+    def test_lookup_precomputed_totals(self):
+        rows = self.index.lookup(["5A", "5B", "5C", "5M", "missing"])
+        assert rows == {
+            "5A": (10, 7, None),
+            "5B": (5, None, None),
+            "5C": (None, 0, None),
+            "5M": (None, None, 3),
+        }
+        assert self.index.generation() == 1
+        assert self.index.stakes("5A") == [("5M", 3), ("5N", 4)]
+
+    def test_reingests_on_new_generation(self):
+        self.index.lookup(["5A"])
+        self.write("balances", {"5A": {"data": {"free": 99}}})
+        self.write("time", {"time": 2.0, "generation": 2})
+        self.index.store.invalidate()
+        assert self.index.lookup(["5A"])["5A"][0] == 99
+
+
+class TestBalanceIndexFromRefresh(unittest.TestCase):
+    def test_ingests_maps_written_by_update_query_maps(self):
+        maps = {
+            "query_map_balances": {"5A": {"data": {"free": 10}}},
+            "query_map_staketo": {"5A": [["5M", 3]]},
+            "query_map_stakefrom": {"5M": [["5A", 3]]},
+        }
+        cwd = os.getcwd()
+        with TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with mock.patch.object(
+                    get_query_maps, "run_query", side_effect=maps.get
+                ), mock.patch.object(
+                    get_query_maps, "targeted_fetchers", return_value={}
+                ):
+                    get_query_maps.update_query_maps(
+                        parallel=False, names=["balances", "total_stake", "stakefrom"]
+                    )
+                index = BalanceIndex("index.sqlite", QueryMapStore("query_maps"))
+                assert index.lookup(["5A", "5M"]) == {
+                    "5A": (10, 3, None),
+                    "5M": (None, None, 3),
+                }
+            finally:
+                os.chdir(cwd)
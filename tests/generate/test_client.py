@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+
+from generate import client
+from generate.client import ClientPool, LazyClient, NodeUnavailable
+
+
+class MockNode:
+    """Stands in for a CommuneClient connected to one node.
+
+    Nodes are configured per URL through `behaviour`: a latency in seconds
+    and whether calls fail.
+    """
+
+    behaviour = {}
+    connections = []
+    transfers = []
+
+    def __init__(self, url, num_connections=1, timeout=None):
+        MockNode.connections.append(url)
+        self.url = url
+
+    def _answer(self, value):
+        latency, fails = MockNode.behaviour.get(self.url, (0, False))
+        time.sleep(latency)
+        if fails:
+            raise ConnectionError(f"{self.url} is down")
+        return value
+
+    def get_block(self):
+        return self._answer({"header": {"number": 1}})
+
+    def query_map_balances(self):
+        return self._answer({"5key": self.url})
+
+    def transfer(self, key, amount, dest):
+        MockNode.transfers.append(self.url)
+        return self._answer({"extrinsic": self.url})
+
+
+class TestClientPool(unittest.TestCase):
+    def setUp(self):
+        MockNode.behaviour = {}
+        MockNode.connections = []
+        MockNode.transfers = []
+        self.pool = ClientPool(
+            ["wss://a", "wss://b"], factory=MockNode, failure_threshold=2, cooldown=60
+        )
+
+    def test_connects_once_on_first_use(self):
+        comx = LazyClient(self.pool)
+        assert MockNode.connections == []
+        assert comx.query_map_balances() == {"5key": "wss://a"}
+        assert MockNode.connections == ["wss://a"]
+        # The untried node is probed next, after that each keeps its client.
+        for _ in range(3):
+            comx.query_map_balances()
+        assert MockNode.connections == ["wss://a", "wss://b"]
+
+    def test_prefers_the_faster_node(self):
+        MockNode.behaviour = {"wss://a": (0.02, False), "wss://b": (0, False)}
+        self.pool.check_health()
+        assert self.pool.call("query_map_balances") == {"5key": "wss://b"}
+
+    def test_fails_over_and_opens_the_circuit(self):
+        MockNode.behaviour = {"wss://a": (0, True)}
+        assert self.pool.call("query_map_balances") == {"5key": "wss://b"}
+        assert self.pool.call("query_map_balances") == {"5key": "wss://b"}
+        metrics = {node["url"]: node for node in self.pool.metrics()}
+        assert metrics["wss://a"]["state"] == "open"
+        assert metrics["wss://a"]["failures"] == 2
+        assert metrics["wss://b"]["requests"] == 2
+        # An open node is skipped without being called.
+        self.pool.call("query_map_balances")
+        assert metrics["wss://a"]["failures"] == self.pool.metrics()[0]["failures"]
+
+    def test_extrinsics_do_not_fail_over(self):
+        MockNode.behaviour = {"wss://a": (0, True)}
+        comx = LazyClient(self.pool)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                comx.transfer("key", 1, "5dest")
+        assert MockNode.transfers == ["wss://a", "wss://a"]
+        # Only once the circuit opened does the next transfer go elsewhere.
+        assert comx.transfer("key", 1, "5dest") == {"extrinsic": "wss://b"}
+
+    def test_half_open_after_cooldown(self):
+        MockNode.behaviour = {"wss://a": (0, True), "wss://b": (0, True)}
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.pool.call("query_map_balances")
+        with self.assertRaises(NodeUnavailable):
+            self.pool.call("query_map_balances")
+        MockNode.behaviour = {}
+        self.pool.cooldown = 0
+        assert self.pool.call("query_map_balances") == {"5key": "wss://a"}
+        assert self.pool.metrics()[0]["state"] == "closed"
+
+    def test_half_open_lets_one_trial_through(self):
+        pool = ClientPool(
+            ["wss://a"], factory=MockNode, failure_threshold=1, cooldown=0
+        )
+        MockNode.behaviour = {"wss://a": (0, True)}
+        with self.assertRaises(ConnectionError):
+            pool.call("query_map_balances")
+        MockNode.behaviour = {"wss://a": (0.2, False)}
+        trial = threading.Thread(target=pool.call, args=("query_map_balances",))
+        trial.start()
+        time.sleep(0.05)
+        with self.assertRaises(NodeUnavailable):
+            pool.call("query_map_balances")
+        trial.join()
+        assert pool.metrics()[0]["state"] == "closed"
+        assert pool.call("query_map_balances") == {"5key": "wss://a"}
+
+    def test_has_query(self):
+        class StubClient:
+            def query_map_balances(self):
+                return {}
+
+            query_map_subnet_burn = None
+
+        assert client.has_query("query_map_balances", StubClient)
+        assert not client.has_query("query_map_subnet_burn", StubClient)
+        assert not client.has_query("query_map_missing", StubClient)
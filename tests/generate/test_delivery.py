@@ -0,0 +1,112 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generate.delivery import WebhookDelivery
+
+
+class StubWebhook(BaseHTTPRequestHandler):
+    """Stands in for the n8n webhook, failing the first `failures` posts."""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            if server.failures > 0:
+                server.failures -= 1
+                status = 503
+            else:
+                server.bodies.append(body)
+                status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWebhookDelivery(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubWebhook)
+        self.server.bodies = []
+        self.server.failures = 0
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+
+    def delivery(self, **kwargs):
+        options = {"flush_interval": 0.05, "backoff": 0.01, "max_retries": 3}
+        return WebhookDelivery(self.url, **{**options, **kwargs})
+
+    def delivered(self):
+        payloads = []
+        for body in self.server.bodies:
+            payloads.extend(body if isinstance(body, list) else [body])
+        return payloads
+
+    def test_batches_in_order(self):
+        delivery = self.delivery(batch_size=3)
+        for i in range(7):
+            delivery.enqueue({"n": i})
+        delivery.stop(timeout=5)
+        assert self.delivered() == [{"n": i} for i in range(7)]
+        stats = delivery.stats()
+        assert stats["sent"] == 7
+        assert stats["batches"] < 7
+
+    def test_retries_with_backoff(self):
+        self.server.failures = 2
+        delivery = self.delivery()
+        delivery.enqueue({"n": 1})
+        delivery.stop(timeout=5)
+        assert self.delivered() == [{"n": 1}]
+        assert delivery.stats()["retries"] == 2
+        assert delivery.stats()["failed"] == 0
+
+    def test_gives_up_after_max_retries(self):
+        self.server.failures = 10
+        delivery = self.delivery(max_retries=1)
+        delivery.enqueue({"n": 1})
+        delivery.stop(timeout=5)
+        assert self.delivered() == []
+        assert delivery.stats()["failed"] == 1
+
+    def test_send_reports_the_outcome(self):
+        self.server.failures = 1
+        delivery = self.delivery(max_retries=1)
+        assert delivery.send({"n": 1})
+        self.server.failures = 10
+        assert not delivery.send({"n": 2})
+        assert self.delivered() == [{"n": 1}]
+
+    def test_full_buffer_drops_oldest_without_spill_dir(self):
+        delivery = self.delivery(buffer_size=2)
+        delivery._stopping.set()
+        delivery.start = lambda: None
+        for i in range(4):
+            delivery.enqueue({"n": i})
+        assert list(delivery._buffer) == [{"n": 2}, {"n": 3}]
+        assert delivery.stats()["dropped"] == 2
+
+    def test_spills_to_disk_and_reloads(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            delivery = self.delivery(buffer_size=2, spill_dir=spill_dir)
+            delivery.start = lambda: None
+            for i in range(5):
+                delivery.enqueue({"n": i})
+            assert delivery.stats()["spilled"] == 3
+            assert delivery.pending() == 5
+
+            # A fresh instance picks the spilled payloads up again.
+            delivery._buffer.clear()
+            resumed = self.delivery(buffer_size=2, spill_dir=spill_dir)
+            resumed.start()
+            resumed.stop(timeout=5)
+            assert self.delivered() == [{"n": i} for i in range(2, 5)]
+            assert resumed.pending() == 0
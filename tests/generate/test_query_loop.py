@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import unittest
+
+from generate.query_loop import QueryMapPoller
+
+
+class TestQueryMapPoller(unittest.TestCase):
+    def poller(self, fetch, **kwargs):
+        return QueryMapPoller(
+            choices=["balances", "weights"],
+            intervals={},
+            default_interval=0.01,
+            jitter=0,
+            fetch=fetch,
+            **kwargs,
+        )
+
+    def test_polls_until_stopped(self):
+        calls = []
+
+        async def scenario():
+            poller = self.poller(lambda choice: calls.append(choice) or {})
+            tasks = poller.start()
+            await asyncio.sleep(0.1)
+            await poller.stop(timeout=1)
+            stopped_at = len(calls)
+            await asyncio.sleep(0.05)
+            return tasks, stopped_at
+
+        tasks, stopped_at = asyncio.run(scenario())
+        assert all(task.done() and not task.cancelled() for task in tasks)
+        assert calls.count("balances") > 1 and calls.count("weights") > 1
+        assert len(calls) == stopped_at
+
+    def test_keeps_polling_after_failures(self):
+        attempts = {"balances": 0}
+
+        def fetch(choice):
+            attempts[choice] += 1
+            if attempts[choice] < 3:
+                raise ConnectionError("node down")
+            return {}
+
+        async def scenario():
+            poller = self.poller(fetch)
+            poller.choices = ["balances"]
+            poller.start()
+            await asyncio.sleep(0.1)
+            await poller.stop(timeout=1)
+
+        asyncio.run(scenario())
+        assert attempts["balances"] > 3
+
+    def test_stop_cancels_a_hung_fetch(self):
+        release = threading.Event()
+
+        async def scenario():
+            poller = self.poller(lambda choice: release.wait(5))
+            tasks = poller.start()
+            await asyncio.sleep(0.05)
+            await poller.stop(timeout=0.05)
+            # Let the worker thread finish so asyncio.run can shut down.
+            release.set()
+            return tasks
+
+        tasks = asyncio.run(scenario())
+        assert all(task.cancelled() for task in tasks)
+
+    def test_stop_before_start_is_a_no_op(self):
+        asyncio.run(self.poller(lambda choice: {}).stop())
+
+
+if __name__ == "__main__":
+    unittest.main()
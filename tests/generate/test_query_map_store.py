@@ -0,0 +1,46 @@
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from generate.query_map_store import QueryMapStore
+
+
+class TestQueryMapStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.store = QueryMapStore(self.path)
+        self.write("balances", {"5Abc": {"data": {"free": 10}}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data, mtime_ns=None):
+        path = self.path / f"{name}.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_get_is_cached(self):
+        first = self.store.get("balances")
+        assert self.store.get("balances") is first
+        assert self.store.lookup("balances", "5Abc") == {"data": {"free": 10}}
+        assert self.store.lookup("balances", "missing") is None
+
+    def test_reloads_when_file_changes(self):
+        self.write("balances", {"5Abc": {"data": {"free": 10}}}, mtime_ns=1)
+        assert self.store.get("balances")["5Abc"]["data"]["free"] == 10
+        self.write("balances", {"5Abc": {"data": {"free": 20}}}, mtime_ns=2)
+        assert self.store.get("balances")["5Abc"]["data"]["free"] == 20
+
+    def test_generation(self):
+        assert self.store.generation() == 0
+        self.write("time", {"time": 1.0, "generation": 3})
+        assert self.store.generation() == 3
+
+    def test_invalidate(self):
+        first = self.store.get("balances")
+        self.store.invalidate()
+        assert self.store.get("balances") is not first
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from generate import get_query_maps
+from generate.query_map_store import QueryMapStore
+from generate.refresher import QueryMapRefresher
+from generate.schedule import AdaptiveSchedule
+
+
+class TestQueryMapRefresher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.store = QueryMapStore(self.path)
+        self.calls = 0
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.tmp.cleanup()
+
+    def refresh(self):
+        self.calls += 1
+        self.release.wait(5)
+        (self.path / "time.json").write_text(
+            json.dumps({"time": datetime.now().timestamp(), "generation": 1}),
+            encoding="utf-8",
+        )
+
+    def test_no_snapshot_is_stale(self):
+        refresher = QueryMapRefresher(self.refresh, store=self.store)
+        assert refresher.snapshot_age() is None
+        assert refresher.is_stale()
+
+    def test_single_flight(self):
+        refresher = QueryMapRefresher(self.refresh, store=self.store)
+        first = refresher.trigger()
+        second = refresher.trigger()
+        assert first is second
+        self.release.set()
+        first.join(5)
+        assert self.calls == 1
+        assert not refresher.is_stale()
+        assert refresher.status()["generation"] == 1
+
+    def test_fresh_snapshot_does_not_refresh(self):
+        (self.path / "time.json").write_text(
+            json.dumps({"time": datetime.now().timestamp()}), encoding="utf-8"
+        )
+        refresher = QueryMapRefresher(self.refresh, store=self.store)
+        assert refresher.refresh_if_stale() is None
+        assert self.calls == 0
+
+    def test_due_schedule_makes_fresh_snapshot_stale(self):
+        now = datetime.now().timestamp()
+        (self.path / "time.json").write_text(
+            json.dumps({"time": now}), encoding="utf-8"
+        )
+        schedule = AdaptiveSchedule(min_interval=60)
+        refresher = QueryMapRefresher(self.refresh, store=self.store, schedule=schedule)
+        schedule.record("balances", {}, now=now)
+        assert not refresher.is_stale()
+        schedule.record("balances", {"5Abc": 1}, now=now - 61)
+        assert refresher.is_stale()
+
+
+class TestRefreshTime(unittest.TestCase):
+    def test_failed_refresh_keeps_snapshot_time(self):
+        def down():
+            raise ConnectionError("node down")
+
+        def update(fetch):
+            with mock.patch.object(get_query_maps, "run_query", side_effect=fetch):
+                get_query_maps.update_query_maps(
+                    parallel=False, retries=0, names=["tempo"]
+                )
+
+        cwd = os.getcwd()
+        with TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                time_path = Path("query_maps/time.json")
+                update(lambda name: down())
+                assert not time_path.exists()
+                update(lambda name: {"0": 100})
+                recorded = time_path.read_bytes()
+                update(lambda name: down())
+                assert time_path.read_bytes() == recorded
+            finally:
+                os.chdir(cwd)
+                get_query_maps.query_map_store.invalidate()
@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate.reporting import ChangeReporter, changed_totals
+
+
+class FakeStore:
+    def __init__(self):
+        self.gen = 1
+
+    def generation(self):
+        return self.gen
+
+
+class TestChangedTotals(unittest.TestCase):
+    def test_thresholds(self):
+        old = {"a": 100.0, "b": 0.0, "c": 5.0}
+        new = {"a": 100.5, "b": 0.5, "c": 5.0, "d": 1.0}
+        assert changed_totals(old, new) == {"a": 100.5, "b": 0.5, "d": 1.0}
+        assert changed_totals(old, new, threshold=1) == {"d": 1.0}
+        assert changed_totals(old, new, threshold_pct=0.01) == {"b": 0.5, "d": 1.0}
+
+
+class TestChangeReporter(unittest.TestCase):
+    def setUp(self):
+        self.posts = []
+        self.store = FakeStore()
+        self.values = {"eden": {"Total Balance": 10.0}, "staff": {"Total Balance": 1.0}}
+        self.state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.state_dir.cleanup)
+        self.state_path = Path(self.state_dir.name) / "state.json"
+
+    def post(self, payload):
+        self.posts.append(payload)
+        return True
+
+    def reporter(self, **kwargs):
+        return ChangeReporter(
+            self.post,
+            reports=["eden", "staff"],
+            totals=lambda name: dict(self.values[name]),
+            store=self.store,
+            state_path=self.state_path,
+            **kwargs,
+        )
+
+    def test_posts_only_changed_fields_on_new_generation(self):
+        reporter = self.reporter(min_interval=0)
+        reporter.check(now=1)
+        assert self.posts[0]["reports"] == {
+            "eden": {"Total Balance": "$10.00"},
+            "staff": {"Total Balance": "$1.00"},
+        }
+        self.values["staff"]["Total Balance"] = 2.0
+        assert reporter.check(now=2) is None  # same generation
+        self.store.gen = 2
+        assert reporter.check(now=3) == {"staff": {"Total Balance": 2.0}}
+        self.store.gen = 3
+        assert reporter.check(now=4) is None  # nothing moved
+        assert len(self.posts) == 2
+
+    def test_min_interval_defers_generation(self):
+        reporter = self.reporter(min_interval=60)
+        reporter.check(now=100)
+        self.values["eden"]["Total Balance"] = 11.0
+        self.store.gen = 2
+        assert reporter.check(now=110) is None
+        assert reporter.check(now=161) == {"eden": {"Total Balance": 11.0}}
+
+    def test_state_survives_restart(self):
+        self.reporter(min_interval=0).check(now=1)
+        self.store.gen = 2
+        assert self.reporter(min_interval=0).check(now=1) is None
+        assert len(self.posts) == 1
+
+    def test_failed_total_or_delivery_retries_generation(self):
+        reporter = self.reporter(min_interval=0)
+        broken = {"staff"}
+
+        def totals(name):
+            if name in broken:
+                raise FileNotFoundError(name)
+            return dict(self.values[name])
+
+        reporter.totals = totals
+        assert reporter.check(now=1) == {"eden": {"Total Balance": 10.0}}
+        broken.clear()
+        assert reporter.check(now=2) == {"staff": {"Total Balance": 1.0}}
+
+        self.store.gen = 2
+        self.values["eden"]["Total Balance"] = 12.0
+
+        def unreachable(payload):
+            raise ConnectionError("webhook down")
+
+        reporter.deliver = unreachable
+        with self.assertRaises(ConnectionError):
+            reporter.check(now=3)
+        reporter.deliver = lambda payload: False
+        assert reporter.check(now=4) is None
+        reporter.deliver = self.post
+        assert reporter.check(now=5) == {"eden": {"Total Balance": 12.0}}
+        assert len(self.posts) == 3
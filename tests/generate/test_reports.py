@@ -0,0 +1,47 @@
+import unittest
+
+from generate.reports import ReportCache
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.builds = []
+        self.snapshot = 1
+        self.cache = ReportCache(
+            build=self.build,
+            version=lambda name: self.snapshot,
+            ttl=60,
+            max_size=2,
+        )
+
+    def build(self, name):
+        self.builds.append(name)
+        return {"report": name, "snapshot": self.snapshot}
+
+    def test_hit_until_snapshot_changes(self):
+        assert self.cache.get("eden") == {"report": "eden", "snapshot": 1}
+        assert self.cache.get("eden") == {"report": "eden", "snapshot": 1}
+        assert self.builds == ["eden"]
+        self.snapshot = 2
+        assert self.cache.get("eden")["snapshot"] == 2
+        assert self.builds == ["eden", "eden"]
+        assert self.cache.stats()["hits"] == 1
+
+    def test_lru_eviction(self):
+        self.cache.get("eden")
+        self.cache.get("staff")
+        self.cache.get("eden")
+        self.cache.get("huck")
+        self.cache.get("eden")
+        self.cache.get("staff")
+        assert self.builds == ["eden", "staff", "huck", "staff"]
+
+    def test_ttl(self):
+        self.cache.ttl = -1
+        self.cache.get("eden")
+        self.cache.get("eden")
+        assert self.builds == ["eden", "eden"]
+
+    def test_unknown_report(self):
+        with self.assertRaises(KeyError):
+            self.cache.get("missing")
@@ -0,0 +1,61 @@
+import unittest
+
+from generate.schedule import AdaptiveSchedule
+
+
+class TestAdaptiveSchedule(unittest.TestCase):
+    def setUp(self):
+        self.schedule = AdaptiveSchedule(
+            intervals={"balances": 60, "founder": 600},
+            min_interval=60,
+            max_interval=3600,
+            baseline_interval=60,
+        )
+
+    def test_unchanged_map_backs_off_to_max(self):
+        for now in range(0, 10):
+            assert self.schedule.record("founder", {"0": "5Abc"}, now=now) is (now == 0)
+        assert self.schedule.interval("founder") == 3600
+
+    def test_changing_map_stays_at_min(self):
+        for now in range(0, 10):
+            self.schedule.record("balances", {"5Abc": now}, now=now)
+        assert self.schedule.interval("balances") == 60
+        assert self.schedule.stats("balances").change_rate == 1.0
+
+    def test_due(self):
+        assert self.schedule.due(["balances", "founder"], now=0) == ["balances", "founder"]
+        self.schedule.record("balances", {}, now=0)
+        self.schedule.record("founder", {}, now=0)
+        assert self.schedule.due(["balances", "founder"], now=120) == ["balances"]
+
+    def test_next_due(self):
+        assert self.schedule.next_due() is None
+        self.schedule.record("balances", {}, now=0)
+        self.schedule.record("founder", {}, now=100)
+        assert self.schedule.next_due() == 60
+
+    def test_record_hashes_encoded_bytes(self):
+        assert self.schedule.record("balances", None, now=0, encoded=b"a")
+        assert not self.schedule.record("balances", None, now=60, encoded=b"a")
+        assert self.schedule.record("balances", None, now=120, encoded=b"b")
+
+    def test_report_counts_saved_calls(self):
+        self.schedule.record("founder", {}, now=0)
+        self.schedule.record("founder", {}, now=600)
+        report = self.schedule.report(now=600)
+        assert report["maps"]["founder"]["calls_saved"] == 9
+        assert report["calls_saved"] == 9
+
+    def test_default_floor_is_the_starting_interval(self):
+        schedule = AdaptiveSchedule(baseline_interval=600)
+        for now in range(0, 3600, 600):
+            schedule.record("balances", {"5Abc": now}, now=now)
+        assert schedule.interval("balances") == 600
+        assert schedule.report(now=3000)["maps"]["balances"]["calls_saved"] == 0
+
+    def test_report_counts_extra_calls(self):
+        schedule = AdaptiveSchedule(min_interval=60, baseline_interval=600)
+        for now in range(0, 600, 60):
+            schedule.record("balances", {"5Abc": now}, now=now)
+        assert schedule.report(now=540)["calls_saved"] == -9
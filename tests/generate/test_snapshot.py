@@ -0,0 +1,40 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from generate.query_map_store import QueryMapStore
+from generate.snapshot import find_snapshot, msgpack, read_snapshot, write_snapshot
+
+BALANCES = {
+    "5Abc": {"nonce": 1, "data": {"free": 10**12, "flags": 2**127}},
+}
+WEIGHTS = {1: [(2, 100), (3, 200)]}
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_json_round_trip_leaves_no_temp_files(self):
+        path = write_snapshot(self.path, "balances", BALANCES, fmt="json")
+        assert read_snapshot(path) == BALANCES
+        assert [p.name for p in self.path.iterdir()] == ["balances.json"]
+
+    @unittest.skipIf(msgpack is None, "msgpack not installed")
+    def test_msgpack_reads_like_json(self):
+        json_path = write_snapshot(self.path, "weights", WEIGHTS, fmt="json")
+        from_json = read_snapshot(json_path)
+        msgpack_path = write_snapshot(self.path, "weights", WEIGHTS, fmt="msgpack")
+        assert not json_path.exists()
+        assert read_snapshot(msgpack_path) == from_json
+        write_snapshot(self.path, "balances", BALANCES, fmt="msgpack")
+        store = QueryMapStore(self.path)
+        assert store.get("balances") == BALANCES
+
+    def test_find_snapshot_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            find_snapshot(self.path, "balances")
@@ -0,0 +1,62 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+from generate.snapshot_history import SnapshotHistory, diff_query_maps
+
+
+class TestSnapshotHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.history = SnapshotHistory(self.tmp.name, max_deltas=10)
+        self.snapshots = [
+            {"5A": 1, "5B": 2},
+            {"5A": 1, "5B": 3},
+            {"5A": 1, "5B": 3, "5C": [["5A", 4]]},
+            {"5B": 5, "5C": [["5A", 4]]},
+        ]
+        for time, snapshot in enumerate(self.snapshots):
+            self.history.record("balances", snapshot, time=time * 10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_diff(self):
+        assert diff_query_maps({"a": 1, "b": 2}, {"b": 3, "c": 4}) == {
+            "added": {"c": 4},
+            "removed": ["a"],
+            "changed": {"b": 3},
+        }
+
+    def test_rebuild_every_version(self):
+        for version, snapshot in enumerate(self.snapshots, start=1):
+            assert self.history.rebuild("balances", version) == snapshot
+        assert self.history.rebuild("balances", at=25) == self.snapshots[2]
+        assert self.history.rebuild("balances") == self.snapshots[-1]
+
+    def test_unchanged_map_is_not_recorded(self):
+        assert self.history.record("balances", self.snapshots[-1], time=99) is None
+        assert len(self.history.versions("balances")) == 4
+
+    def test_value_at(self):
+        assert self.history.value_at("balances", "5B", version=1) == 2
+        assert self.history.value_at("balances", "5B", at=15) == 3
+        assert self.history.value_at("balances", "5A", version=4) is None
+
+    def test_compact(self):
+        self.history.compact("balances", keep=1)
+        assert [v for v, _ in self.history.versions("balances")] == [3, 4]
+        assert self.history.rebuild("balances", 3) == self.snapshots[2]
+        assert self.history.rebuild("balances", 4) == self.snapshots[3]
+        with self.assertRaises(KeyError):
+            self.history.rebuild("balances", 1)
+
+    def test_record_compacts_in_batches(self):
+        history = SnapshotHistory(
+            self.tmp.name + "/batched", max_deltas=2, compact_slack=2
+        )
+        for time in range(5):
+            history.record("balances", {"5A": time}, time=time)
+        assert [v for v, _ in history.versions("balances")] == [1, 2, 3, 4, 5]
+        history.record("balances", {"5A": 5}, time=5)
+        assert [v for v, _ in history.versions("balances")] == [4, 5, 6]
+        assert history.rebuild("balances", 4) == {"5A": 3}
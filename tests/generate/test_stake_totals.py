@@ -0,0 +1,23 @@
+import unittest
+
+from generate.stake_totals import build_stake_totals
+
+
+class TestStakeTotals(unittest.TestCase):
+    def test_build_stake_totals(self):
+        totals = build_stake_totals(
+            {"5A": [["5M", 3], ["5N", 7]], "5B": []},
+            {"5M": [["5A", 3]]},
+        )
+        assert totals["5A"] == {
+            "staketo": 10,
+            "staketo_count": 2,
+            "largest_staketo": 7,
+            "stakefrom": None,
+            "stakefrom_count": None,
+            "largest_stakefrom": None,
+        }
+        assert totals["5B"]["staketo"] == 0
+        assert totals["5B"]["largest_staketo"] == 0
+        assert totals["5M"]["stakefrom"] == 3
+        assert totals["5M"]["staketo"] is None
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from generate import get_query_maps
+from generate.client import ClientPool
+from generate.keyring_maps import keyring_maps
+from generate.query_map_store import QueryMapStore
+from generate.schedule import AdaptiveSchedule
+from generate.targeted_fetch import (
+    fetch_targeted_map,
+    keyring_addresses,
+    targeted_fetchers,
+    use_targeted_fetch,
+)
+
+ACCOUNTS = {"5a": {"data": {"free": 10}}, "5b": {"data": {"free": 20}}}
+STAKE_TO = {("5a", "5m1"): 5, ("5a", "5m2"): 7, ("5c", "5m1"): 1}
+
+
+class FakeSubstrate:
+    def __init__(self):
+        self.multi_calls = []
+
+    def get_block_hash(self):
+        return "0xblock"
+
+    def create_storage_key(self, pallet, storage_function, params):
+        return SimpleNamespace(params=params)
+
+    def query_multi(self, storage_keys, block_hash=None):
+        self.multi_calls.append(len(storage_keys))
+        default = {"data": {"free": 0}}
+        return [
+            (key, SimpleNamespace(value=ACCOUNTS.get(key.params[0], default)))
+            for key in storage_keys
+        ]
+
+
+class FakeClient:
+    def __init__(self):
+        self.substrate = FakeSubstrate()
+        self.block_hashes = set()
+
+    @contextmanager
+    def get_conn(self, init=False):
+        yield self.substrate
+
+    def query_map(self, name, params, extract_value=True, block_hash=None):
+        self.block_hashes.add(block_hash)
+        entries = {k2: v for (k1, k2), v in STAKE_TO.items() if k1 == params[0]}
+        return {name: entries} if entries else {}
+
+
+def pool_for(client):
+    return ClientPool(["wss://fake"], factory=lambda url, **kwargs: client)
+
+
+class TestTargetedFetch(unittest.TestCase):
+    def test_accounts_in_chunks(self):
+        client = FakeClient()
+        pool = pool_for(client)
+        accounts = fetch_targeted_map("balances", ["5a", "5b", "5c"], pool)
+        assert accounts["5a"] == ACCOUNTS["5a"]
+        assert accounts["5c"] == {"data": {"free": 0}}
+        assert client.substrate.multi_calls == [3]
+        assert pool.metrics()[0]["requests"] == 1
+
+    def test_stakes_keep_full_map_shape(self):
+        client = FakeClient()
+        stakes = fetch_targeted_map("total_stake", ["5a", "5b"], pool_for(client))
+        assert stakes == {"5a": [("5m1", 5), ("5m2", 7)]}
+        assert client.block_hashes == {"0xblock"}
+
+    def test_subsets_get_their_own_names(self):
+        assert targeted_fetchers(["balances", "weights"], mode="never") == {}
+        with tempfile.TemporaryDirectory() as tmp:
+            store = QueryMapStore(tmp)
+            full = Path(tmp) / "balances.json"
+            subset = Path(tmp) / "keyring_balances.json"
+            full.write_text(json.dumps(ACCOUNTS), encoding="utf-8")
+            assert keyring_maps(["balances"], store, "auto") is None
+            subset.write_text(json.dumps({"5a": ACCOUNTS["5a"]}), encoding="utf-8")
+            assert keyring_maps(["balances"], store, "auto") == [{"5a": ACCOUNTS["5a"]}]
+            assert keyring_maps(["balances"], store, "never") is None
+            # A later full refresh makes the subset stale.
+            os.utime(full, ns=(0, store.modified("keyring_balances") + 1))
+            assert keyring_maps(["balances"], store, "auto") is None
+
+    def test_schedule_tracks_subsets_under_their_own_names(self):
+        fetched = []
+
+        def fetch():
+            fetched.append("keyring_balances")
+            return {"5a": ACCOUNTS["5a"]}
+
+        schedule = AdaptiveSchedule(baseline_interval=600)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with mock.patch.object(
+                    get_query_maps,
+                    "targeted_fetchers",
+                    return_value={"keyring_balances": fetch},
+                ):
+                    for _ in range(2):
+                        get_query_maps.update_query_maps(
+                            parallel=False, names=["balances"], schedule=schedule
+                        )
+            finally:
+                os.chdir(cwd)
+                get_query_maps.query_map_store.invalidate()
+        assert fetched == ["keyring_balances"]
+        assert schedule.stats("keyring_balances").fetches == 1
+
+    def test_keyring_union_and_fallback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, keys in enumerate((["5a", "5b"], ["5b", "5c"])):
+                path = Path(tmp) / f"{i}.json"
+                path.write_text(
+                    json.dumps({k: {"key": k, "name": k} for k in keys}),
+                    encoding="utf-8",
+                )
+                paths.append(path)
+            addresses = keyring_addresses(paths + [Path(tmp) / "missing.json"])
+        assert addresses == ["5a", "5b", "5c"]
+        assert use_targeted_fetch(addresses, "auto")
+        assert not use_targeted_fetch(addresses)
+        assert not use_targeted_fetch(["5x"] * 5000, "auto")
+        assert use_targeted_fetch(["5x"] * 5000, "always")
@@ -0,0 +1,59 @@
+import json
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+
+from routes import reports_api
+
+ROWS = [
+    {
+        "key": f"5key{i}",
+        "name": f"key{i}",
+        "balance": float(i),
+        "stake": 1.0,
+        "total": float(i) + 1,
+        "stake_from": 0,
+    }
+    for i in range(5)
+]
+
+
+class TestReportsApi(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(reports_api, "iter_report_rows", lambda name: iter(ROWS)),
+            mock.patch.object(
+                reports_api, "get_report", lambda name: {r["key"]: r for r in ROWS}
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_page_and_fields(self):
+        rows = reports_api.select_rows("eden", 1, 2, None, ("key", "total"))
+        lines = list(reports_api.ndjson_lines(rows))
+        assert [json.loads(line) for line in lines] == [
+            {"key": "5key1", "total": 2.0},
+            {"key": "5key2", "total": 3.0},
+        ]
+
+    def test_sorted_json_array(self):
+        rows = reports_api.select_rows("eden", 0, 2, "-balance", ("balance",))
+        body = "".join(reports_api.json_array_chunks(rows))
+        assert json.loads(body) == [{"balance": 4.0}, {"balance": 3.0}]
+        assert json.loads("".join(reports_api.json_array_chunks(iter([])))) == []
+
+    def test_errors(self):
+        for kwargs, status in (
+            ({"report_name": "nope"}, 404),
+            ({"report_name": "eden", "fields": "secret"}, 400),
+            ({"report_name": "eden", "sort": "secret"}, 400),
+            ({"report_name": "eden", "format": "xml"}, 400),
+        ):
+            with self.assertRaises(HTTPException) as raised:
+                reports_api.stream_report(
+                    **{"format": "ndjson", "offset": 0, "limit": None, **kwargs}
+                )
+            assert raised.exception.status_code == status
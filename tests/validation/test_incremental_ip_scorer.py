@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from validation.incremental_ip_scorer import IncrementalIPScorer
+from validation.ip_prefix_index import penalize_addresses
+
+
+class TestIncrementalIPScorer(unittest.TestCase):
+    def test_emits_only_changed_miners(self):
+        scorer = IncrementalIPScorer(
+            {"1": "10.0.0.1:80", "2": "10.0.0.2:80", "3": "10.9.9.9:80"}
+        )
+        assert scorer.scores()["3"] == (4, "10.9.9.9:80")
+        # Moving keeps the penalty, so nothing is reported.
+        assert scorer.update({"3": "10.0.0.1:81"}) == {}
+        assert scorer.scores()["3"] == (4, "10.0.0.1:81")
+        assert scorer.update({"3": None}) == {"3": None}
+        assert scorer.update({"2": "None:None", "4": "10.1.1.1:80"}) == {
+            "2": None,
+            "4": (4, "10.1.1.1:80"),
+        }
+        assert scorer.update({"4": "miner.example:80"}) == {
+            "4": (0, "miner.example:80")
+        }
+
+    def test_sync_matches_full_rescore(self):
+        rng = random.Random(1)
+
+        def address():
+            if rng.random() < 0.1:
+                return "None:None"
+            if rng.random() < 0.1:
+                return f"miner{rng.randint(0, 3)}.example:80"
+            return f"10.{rng.randint(0, 2)}.{rng.randint(0, 3)}.{rng.randint(0, 4)}:80"
+
+        addresses = {str(uid): address() for uid in range(200)}
+        scorer = IncrementalIPScorer()
+        scorer.sync(addresses)
+        for _ in range(50):
+            for uid in rng.sample(sorted(addresses), 5):
+                addresses[uid] = address()
+            addresses.pop(rng.choice(sorted(addresses)))
+            before = scorer.scores()
+            changed = scorer.sync(addresses)
+            after = scorer.scores()
+            assert after == penalize_addresses(addresses)
+            for uid in set(before) | set(after):
+                if before.get(uid, (None,))[0] != after.get(uid, (None,))[0]:
+                    assert uid in changed
@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from validation.ip_prefix_index import PrefixIndex, parse_ip, penalize_addresses
+from validation.punish_ip_similarity import punish_ips
+
+
+def string_prefix_scores(miner_addresses):
+    """The original process_addresses/calculate_score scoring, without prints."""
+    unique_ips = set()
+    for value in miner_addresses.values():
+        if value != "None:None" and not value.startswith("localhost"):
+            ip_parts = value.split(":")[0].split(".")
+            unique_ips.update(
+                ".".join(ip_parts[:i]) for i in range(1, len(ip_parts) + 1)
+            )
+    scores = {}
+    for miner_id, address in miner_addresses.items():
+        if address != "None:None" and not address.startswith("localhost"):
+            parts = address.split(":")[0].split(".")
+            score = 0
+            for i in range(3, len(parts) + 1):
+                if ".".join(parts[:i]) in unique_ips:
+                    score += 1 if i == 3 else 3
+            scores[miner_id] = (score, address)
+    return scores
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def test_parse_ip(self):
+        assert parse_ip("1.2.3.4:80") == (32, 0x01020304)
+        assert parse_ip("[::1]:80") == (128, 1)
+        assert parse_ip("None:None") is None
+        assert parse_ip("localhost:8080") is None
+        assert parse_ip("") is None
+
+    def test_penalties_match_string_prefix_scoring(self):
+        scores = punish_ips(
+            {
+                "0": "None:None",
+                "1": "10.0.0.1:80",
+                "2": "10.0.0.1:81",
+                "3": "10.0.0.2:80",
+                "5": "[2001:db8::1]:80",
+                "6": "miner.example:80",
+                "7": "localhost:8080",
+            }
+        )
+        assert scores == {
+            "1": (4, "10.0.0.1:80"),
+            "2": (4, "10.0.0.1:81"),
+            "3": (4, "10.0.0.2:80"),
+            "5": (4, "[2001:db8::1]:80"),
+            "6": (0, "miner.example:80"),
+        }
+        rng = random.Random(2)
+        addresses = {
+            str(uid): rng.choice(
+                [
+                    "None:None",
+                    "localhost:8080",
+                    f"miner{rng.randint(0, 3)}.example:80",
+                    f"10.0.{rng.randint(0, 3)}.{rng.randint(0, 9)}:{rng.randint(1, 9)}",
+                ]
+            )
+            for uid in range(300)
+        }
+        assert punish_ips(addresses) == string_prefix_scores(addresses)
+
+    def test_index_matches_batch(self):
+        addresses = {str(i): f"10.0.{i % 3}.{i % 5}:80" for i in range(30)}
+        index = PrefixIndex(parse_ip(address) for address in addresses.values())
+        expected = penalize_addresses(addresses)
+        for miner_id, address in addresses.items():
+            assert index.penalty(parse_ip(address)) == expected[miner_id][0]
+        for address in list(addresses.values())[:10]:
+            index.remove(parse_ip(address))
+        rest = dict(list(addresses.items())[10:])
+        expected = penalize_addresses(rest)
+        for miner_id, address in rest.items():
+            assert index.penalty(parse_ip(address)) == expected[miner_id][0]
@@ -0,0 +1,69 @@
+import random
+import statistics
+import unittest
+
+from validation.weight_engine import detect_outliers, identify_boosted_miners
+
+
+def synthetic_weights(validators, miners, seed=0):
+    """{validator: [[uid, weight], ...]} with a few validators boosting miners."""
+    rng = random.Random(seed)
+    data = {}
+    for validator in range(validators):
+        uids = rng.sample(range(miners), rng.randint(miners // 2, miners))
+        weights = [[uid, rng.randint(1, 1000)] for uid in sorted(uids)]
+        if validator % 10 == 0:
+            for pair in rng.sample(weights, 3):
+                pair[1] = rng.randint(20_000, 65_535)
+        data[str(validator)] = weights
+    return data
+
+
+def loop_detect_outliers(data, threshold=2):
+    """The original per-item detect_outliers."""
+    outliers = {}
+    for validator, weights in data.items():
+        if weights:
+            if flat_weights := [
+                w for sublist in weights for w in sublist if isinstance(w, (int, float))
+            ]:
+                mean = statistics.mean(flat_weights)
+                stdev = statistics.stdev(flat_weights)
+                for i, sublist in enumerate(weights):
+                    for j, weight in enumerate(sublist):
+                        if isinstance(weight, (int, float)):
+                            z_score = (weight - mean) / stdev
+                            if abs(z_score) > threshold:
+                                outliers.setdefault(validator, []).append(
+                                    (i, j, weight)
+                                )
+    return outliers
+
+
+class TestWeightEngine(unittest.TestCase):
+    def test_matches_statistics_loop(self):
+        data = synthetic_weights(30, 200, seed=3)
+        data["empty"] = []
+        data["ragged"] = [[1, 5], [2, "x", 7], [3], [4, None, 900], [5, 6.5]]
+        outliers = detect_outliers(data)
+        assert outliers == loop_detect_outliers(data)
+        assert outliers
+
+    def test_boosted_miners(self):
+        data = {
+            "a": [[uid, 10] for uid in range(20)] + [[20, 5000]],
+            "b": [[uid, 10] for uid in range(20)] + [[20, 6000]],
+        }
+        outliers = detect_outliers(data)
+        assert outliers == {"a": [(20, 1, 5000)], "b": [(20, 1, 6000)]}
+        assert identify_boosted_miners(data, outliers) == {
+            20: [("a", 5000), ("b", 6000)]
+        }
+
+    def test_no_spread_has_no_outliers(self):
+        data = {"a": [[1]], "b": [[1, 1], [1, 1]], "c": [[0, 1]] * 20 + [[0, 90]]}
+        assert detect_outliers(data) == {"c": [(20, 1, 90)]}
+
+
+if __name__ == "__main__":
+    unittest.main()
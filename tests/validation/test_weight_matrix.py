@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from validation.weight_matrix import WeightMatrix, WeightMatrixStore
+
+
+class StubStore:
+    def __init__(self, weights, mtime=1):
+        self.weights = weights
+        self.mtime = mtime
+        self.size = 3
+
+    def get(self, name):
+        assert name == "weights"
+        return self.weights
+
+    def signature(self, name):
+        assert name == "weights"
+        return self.mtime, self.size
+
+
+WEIGHTS = {
+    "0": [[3, 10], [1, 30]],
+    "1": [[1, 20], [2, 40], [3, 60]],
+    "2": [],
+}
+
+
+class TestWeightMatrix(unittest.TestCase):
+    def test_slices_and_sums(self):
+        matrix = WeightMatrix.from_query_map(WEIGHTS)
+        assert matrix.shape == (3, 4)
+        miners, weights = matrix.row("0")
+        assert miners.tolist() == [1, 3] and weights.tolist() == [30, 10]
+        rows, weights = matrix.column(3)
+        assert rows.tolist() == [0, 1] and weights.tolist() == [10, 60]
+        assert matrix.column(9)[0].tolist() == []
+        assert matrix.incoming().tolist() == [0, 50, 40, 70]
+        counts, mean, stdev = matrix.validator_stats()
+        assert counts.tolist() == [2, 3, 0]
+        assert mean[:2].tolist() == [20.0, 40.0]
+        assert np.isclose(stdev[1], 20.0) and np.isnan(stdev[2])
+
+    def test_ragged_and_mixed_lists(self):
+        matrix = WeightMatrix.from_query_map(
+            {"0": [[2, 5], [1, "x"], [0, 7, 1], [4]], "1": [[1, 3.0], [3, 9]]}
+        )
+        assert matrix.row("0")[0].tolist() == [0, 2]
+        assert matrix.row("0")[1].tolist() == [7, 5]
+        assert matrix.incoming().tolist() == [7, 3, 5, 9]
+
+    def test_store_saves_memory_mapped_generations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = StubStore(WEIGHTS)
+            matrix = WeightMatrixStore(directory, source).get()
+            assert isinstance(matrix.data, np.memmap)
+            assert matrix.incoming().tolist() == [0, 50, 40, 70]
+
+            # A second process picks up the saved arrays instead of rebuilding.
+            source.weights = {}
+            shared = WeightMatrixStore(directory, source).get()
+            assert shared.validators == ["0", "1", "2"]
+
+            source.mtime = 2
+            assert WeightMatrixStore(directory, source).get().shape == (0, 0)
+
+    def test_one_build_per_snapshot_across_stores(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = StubStore(WEIGHTS)
+            calls = []
+            get = source.get
+
+            def slow_get(name):
+                calls.append(name)
+                time.sleep(0.05)
+                return get(name)
+
+            source.get = slow_get
+            # Separate stores open the lock file separately, like processes do.
+            stores = [WeightMatrixStore(directory, source) for _ in range(4)]
+            threads = [threading.Thread(target=store.get) for store in stores]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert calls == ["weights"]
+            assert all(store.get().shape == (3, 4) for store in stores)
+            assert sorted(os.listdir(directory)) == [".lock", "1-3", "current"]
+
+    def test_keeps_newest_snapshots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = StubStore(WEIGHTS)
+            store = WeightMatrixStore(directory, source)
+            for mtime in (9, 10, 11):
+                source.mtime = mtime
+                store.get()
+            assert sorted(os.listdir(directory)) == [
+                ".lock",
+                "10-3",
+                "11-3",
+                "current",
+            ]
+            source.mtime = 1
+            store.get()
+            assert "1-3" not in os.listdir(directory)
+            assert (Path(directory) / "current").read_text() == "11-3"
+
+
+if __name__ == "__main__":
+    unittest.main()
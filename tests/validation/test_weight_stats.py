@@ -0,0 +1,101 @@
+import math
+import statistics
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from validation.weight_matrix import WeightMatrix, WeightMatrixStore
+from validation.weight_stats import Reservoir, RunningStats, WeightDeviationMonitor
+
+
+def snapshot(boost=None, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = {
+        str(validator): [[uid, int(rng.integers(90, 110))] for uid in range(50)]
+        for validator in range(4)
+    }
+    if boost is not None:
+        weights["0"][boost][1] = 5000
+    return WeightMatrix.from_query_map(weights)
+
+
+class TestWeightStats(unittest.TestCase):
+    def test_running_stats_match_statistics(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3]
+        stats = RunningStats()
+        stats.push(values[:3])
+        stats.push(values[3:])
+        assert math.isclose(stats.mean, statistics.mean(values))
+        assert math.isclose(stats.stdev, statistics.stdev(values))
+        assert math.isnan(RunningStats().variance)
+
+    def test_reservoir_is_bounded(self):
+        reservoir = Reservoir(size=100, rng=np.random.default_rng(1))
+        for start in range(0, 10_000, 1000):
+            reservoir.push(np.arange(start, start + 1000))
+        assert len(reservoir.values) == 100 and reservoir.seen == 10_000
+        median, mad = reservoir.median_mad()
+        assert 3000 < median < 7000 and mad > 1000
+
+    def test_flags_miner_boosted_across_window(self):
+        monitor = WeightDeviationMonitor(window=4, min_hits=3, seed=0)
+        monitor.observe(snapshot(seed=0))
+        for step in range(1, 4):
+            boosts = monitor.observe(snapshot(boost=7, seed=step))
+            assert list(boosts) == [7] and boosts[7][0][:2] == ("0", 5000)
+        assert monitor.boosted_miners() == {7: 3}
+        for step in range(4, 6):
+            monitor.observe(snapshot(seed=step))
+        assert monitor.boosted_miners() == {}
+        assert monitor.miners.count[7] == 6
+
+    def test_identical_weights_do_not_divide_by_zero(self):
+        flat = WeightMatrix.from_query_map({"0": [[uid, 10] for uid in range(5)]})
+        monitor = WeightDeviationMonitor(seed=0)
+        assert monitor.observe(flat) == {}
+        assert monitor.observe(flat) == {}
+
+    def test_observe_store_once_per_weights_snapshot(self):
+        class StubQueryMaps:
+            def __init__(self):
+                self.mtime = 1
+                self.generation_value = 1
+                self.weights = {"0": [[uid, 100] for uid in range(50)]}
+
+            def get(self, name):
+                return self.weights
+
+            def signature(self, name):
+                return self.mtime, 1
+
+            def generation(self):
+                return self.generation_value
+
+        query_maps = StubQueryMaps()
+        monitor = WeightDeviationMonitor(window=4, min_hits=3, seed=0)
+        with tempfile.TemporaryDirectory() as directory:
+            store = WeightMatrixStore(directory, query_maps)
+            threads = [
+                threading.Thread(target=monitor.observe_store, args=(store,))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert monitor.snapshots == 1
+            # Refreshes that only changed other maps add no snapshots.
+            for generation in range(2, 6):
+                query_maps.generation_value = generation
+                assert monitor.observe_store(store) == {}
+            assert monitor.snapshots == 1
+            query_maps.mtime = 2
+            query_maps.weights["0"][7][1] = 5000
+            monitor.observe_store(store)
+            assert monitor.snapshots == 2 and monitor.snapshot_key == "2-1"
+
+
+if __name__ == "__main__":
+    unittest.main()
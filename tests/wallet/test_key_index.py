@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from wallet import key_index as key_index_module
+from wallet.key_index import KeyIndex
+
+
+def write_keys(path, keys, mtime_ns):
+    data = {name: {"key": key, "name": name} for name, key in keys.items()}
+    data["broken"] = {"name": "no key"}
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestKeyIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.eden = Path(self.tmp.name) / "eden.json"
+        self.staff = Path(self.tmp.name) / "staff.json"
+        write_keys(self.eden, {"alice": "5a", "bob": "5b"}, 1_000)
+        write_keys(self.staff, {"carol": "5c", "bob": "5b"}, 1_000)
+        self.index = KeyIndex()
+
+    def test_parses_once_until_the_file_changes(self):
+        parse = mock.Mock(wraps=key_index_module.parse_key_file)
+        with mock.patch.object(key_index_module, "parse_key_file", parse):
+            first = self.index.key_dict(self.eden)
+            assert self.index.key_dict(self.eden) is first
+            assert parse.call_count == 1
+            write_keys(self.eden, {"alice": "5a", "dave": "5d"}, 2_000)
+            assert set(self.index.key_dict(self.eden)) == {"5a", "5d"}
+            assert parse.call_count == 2
+
+    def test_indexes(self):
+        assert self.index.key_dict(self.eden)["5a"] == {"key": "5a", "name": "alice"}
+        assert self.index.names(self.eden) == {"5a": "alice", "5b": "bob"}
+        assert self.index.addresses(self.staff) == {"carol": "5c", "bob": "5b"}
+
+    def test_union(self):
+        missing = Path(self.tmp.name) / "missing.json"
+        union = self.index.union([self.eden, self.staff, missing])
+        assert union == {"5a", "5b", "5c"}
+        assert self.index.union([self.eden, self.staff]) is union
+        write_keys(self.staff, {"erin": "5e"}, 3_000)
+        assert self.index.union([self.eden, self.staff]) == {"5a", "5b", "5e"}
@@ -0,0 +1,96 @@
+from validation.ip_prefix_index import is_unset, parse_ip, penalty_for, prefix_keys
+
+
+class IncrementalIPScorer:
+    """IP similarity penalties kept up to date from address deltas.
+
+    Miners are bucketed by their /24 and /32 keys. An added, moved or
+    removed UID only rescores the miners in the buckets it left and joined,
+    so a refresh that changes a few UIDs costs a few bucket lookups instead
+    of reclustering the whole subnet. Scores match penalize_addresses().
+    """
+
+    def __init__(self, miner_addresses=None):
+        self.addresses = {}
+        self.keys = {}
+        self.subnets = {}
+        self.hosts = {}
+        self.penalties = {}
+        if miner_addresses:
+            self.update(miner_addresses)
+
+    def scores(self):
+        """{uid: (penalty, address)} like punish_ips()."""
+        return {
+            uid: (penalty, self.addresses[uid])
+            for uid, penalty in self.penalties.items()
+        }
+
+    def _leave(self, uid):
+        subnet, host = self.keys.pop(uid)
+        for buckets, key in ((self.subnets, subnet), (self.hosts, host)):
+            buckets[key].discard(uid)
+            if not buckets[key]:
+                del buckets[key]
+        return subnet
+
+    def _join(self, uid, keys):
+        self.keys[uid] = keys
+        subnet, host = keys
+        self.subnets.setdefault(subnet, set()).add(uid)
+        self.hosts.setdefault(host, set()).add(uid)
+        return subnet
+
+    def _penalty(self, uid):
+        subnet, host = self.keys[uid]
+        return penalty_for(len(self.subnets[subnet]), len(self.hosts[host]))
+
+    def update(self, changes):
+        """Apply {uid: address} changes, a None address removes the UID.
+
+        Returns {uid: (penalty, address)} for the miners whose penalty
+        changed, with None for miners that no longer have a score.
+        """
+        touched = set()
+        changed = {}
+        for uid, address in changes.items():
+            ip = parse_ip(address) if address is not None else None
+            keys = prefix_keys(ip) if ip is not None else None
+            if uid in self.keys:
+                if self.keys[uid] == keys:
+                    self.addresses[uid] = address
+                    continue
+                touched.add(self._leave(uid))
+            if keys is None and not is_unset(address):
+                # A hostname has no prefix to share and scores 0.
+                self.addresses[uid] = address
+                if self.penalties.get(uid) != 0:
+                    self.penalties[uid] = 0
+                    changed[uid] = (0, address)
+                continue
+            if keys is None:
+                self.addresses.pop(uid, None)
+                if self.penalties.pop(uid, None) is not None:
+                    changed[uid] = None
+                continue
+            self.addresses[uid] = address
+            touched.add(self._join(uid, keys))
+        for subnet in touched:
+            for uid in self.subnets.get(subnet, ()):
+                penalty = self._penalty(uid)
+                if self.penalties.get(uid) != penalty:
+                    self.penalties[uid] = penalty
+                    changed[uid] = (penalty, self.addresses[uid])
+        return changed
+
+    def sync(self, miner_addresses):
+        """Diff a full query_map_address against the current state and update."""
+        changes = {
+            uid: address
+            for uid, address in miner_addresses.items()
+            if self.addresses.get(uid) != address
+        }
+        changes.update(
+            (uid, None) for uid in self.addresses if uid not in miner_addresses
+        )
+        return self.update(changes)
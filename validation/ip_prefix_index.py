@@ -0,0 +1,105 @@
+import socket
+from collections import Counter
+
+# Penalty for the /24 (IPv6 /64) and for the exact address. Like the
+# original string-prefix scoring, a miner's own address is in the table it
+# is matched against, so a prefix counts once any miner holds it.
+SUBNET_PENALTY = 1
+HOST_PENALTY = 3
+# Miners holding a prefix before it is penalized, the miner itself included.
+PREFIX_MIN_COUNT = 1
+
+# IPv6 keys carry a tag bit above the widest IPv4 key so the families
+# never collide in one counter.
+IPV6_SUBNET_TAG = 1 << 64
+IPV6_HOST_TAG = 1 << 128
+
+
+def parse_ip(address):
+    """Return (bits, packed int) for a "host:port" string, None if there is no IP.
+
+    Accepts "1.2.3.4:8080", "[2001:db8::1]:8080" and a bare IP. Hostnames,
+    "None:None" and localhost have no IP and give None.
+    """
+    if not address:
+        return None
+    host = address
+    if address.startswith("["):
+        host = address[1 : address.find("]")]
+    elif address.count(":") == 1:
+        host = address.split(":")[0]
+    try:
+        return 32, int.from_bytes(socket.inet_pton(socket.AF_INET, host), "big")
+    except OSError:
+        pass
+    try:
+        return 128, int.from_bytes(socket.inet_pton(socket.AF_INET6, host), "big")
+    except OSError:
+        return None
+
+
+def is_unset(address):
+    """Whether the original scoring skipped address, "None:None" or localhost."""
+    return not address or address == "None:None" or address.startswith("localhost")
+
+
+def prefix_keys(ip):
+    """(subnet key, host key) integer masks of a parse_ip() result."""
+    bits, value = ip
+    if bits == 32:
+        return value >> 8, value
+    return IPV6_SUBNET_TAG | (value >> 64), IPV6_HOST_TAG | value
+
+
+def penalty_for(subnet_count, host_count):
+    return SUBNET_PENALTY * (subnet_count >= PREFIX_MIN_COUNT) + HOST_PENALTY * (
+        host_count >= PREFIX_MIN_COUNT
+    )
+
+
+class PrefixIndex:
+    """Miner counts per /24 and /32 (IPv6 /64 and /128) prefix."""
+
+    def __init__(self, ips=()):
+        self.subnets = Counter()
+        self.hosts = Counter()
+        for ip in ips:
+            self.add(ip)
+
+    def add(self, ip):
+        subnet, host = prefix_keys(ip)
+        self.subnets[subnet] += 1
+        self.hosts[host] += 1
+
+    def remove(self, ip):
+        subnet, host = prefix_keys(ip)
+        for counts, key in ((self.subnets, subnet), (self.hosts, host)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def penalty(self, ip):
+        subnet, host = prefix_keys(ip)
+        return penalty_for(self.subnets[subnet], self.hosts[host])
+
+
+def penalize_addresses(miner_addresses):
+    """{miner_id: (penalty, address)} for every miner with a set address.
+
+    Hostnames share no prefix with anyone and score 0, as in the original.
+    """
+    miner_keys = {}
+    for miner_id, address in miner_addresses.items():
+        if is_unset(address):
+            continue
+        ip = parse_ip(address)
+        miner_keys[miner_id] = prefix_keys(ip) if ip is not None else None
+    subnets = Counter(keys[0] for keys in miner_keys.values() if keys is not None)
+    hosts = Counter(keys[1] for keys in miner_keys.values() if keys is not None)
+    return {
+        miner_id: (
+            penalty_for(subnets[keys[0]], hosts[keys[1]]) if keys is not None else 0,
+            miner_addresses[miner_id],
+        )
+        for miner_id, keys in miner_keys.items()
+    }
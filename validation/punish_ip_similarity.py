@@ -1,47 +1,26 @@
-def process_addresses(addresses):
-    unique_ips = {}
-    for _, value in addresses.items():
-        if value != "None:None" and not value.startswith("localhost"):
-            ip, _ = value.split(":")
-            ip_parts = ip.split(".")
-            for i in range(1, len(ip_parts) + 1):
-                partial_ip = ".".join(ip_parts[:i])
-                if partial_ip not in unique_ips:
-                    unique_ips[partial_ip] = set()
-                unique_ips[partial_ip].add(ip)
+from validation.incremental_ip_scorer import IncrementalIPScorer
+from validation.ip_prefix_index import PrefixIndex, parse_ip, penalize_addresses
+
 
-    return unique_ips
+def process_addresses(addresses):
+    return PrefixIndex(ip for ip in map(parse_ip, addresses.values()) if ip is not None)
 
 
 def calculate_score(miner_ip, unique_ips):
-    score_reduction = 0
-    miner_parts = miner_ip.split(".")
+    # Penalty for sharing the /24 (1) and the exact IP (3) with another miner.
+    return unique_ips.penalty(parse_ip(miner_ip))
 
-    for i in range(3, len(miner_parts) + 1):
-        partial_ip = ".".join(miner_parts[:i])
-        if partial_ip in unique_ips:
-            if i == 3:
-                score_reduction += 1  # Penalty for 3 matching segments
-            elif i == 4:
-                score_reduction += 3  # Higher penalty for 4 matching segments
 
-    return score_reduction
+def punish_ips(miner_addresses):
+    return penalize_addresses(miner_addresses)
 
 
-def punish_ips(miner_addresses):
-    # Process the addresses
-    unique_ips = process_addresses(miner_addresses)
-    print("Unique IPs:", unique_ips)
-
-    miner_data_dict = {}
-    # Now, let's calculate the score for each miner
-    for miner_id, address in miner_addresses.items():
-        if address != "None:None" and not address.startswith("localhost"):
-            ip, port = address.split(":")
-            score_reduction = calculate_score(ip, unique_ips)
-            print(f"Miner {miner_id} (IP: {ip}): Score reduction = {score_reduction}")
-            miner_data_dict[miner_id] = (score_reduction, address)
-    return miner_data_dict
+ip_scorer = IncrementalIPScorer()
+
+
+def rescore_ips(miner_addresses):
+    """Miners whose penalty changed since the last call, None for dropped UIDs."""
+    return ip_scorer.sync(miner_addresses)
 
 
 if __name__ == "__main__":
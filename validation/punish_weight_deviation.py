@@ -1,36 +1,6 @@
 import json
-import statistics
 
-
-def detect_outliers(data, threshold=2):
-    outliers = {}
-    for validator, weights in data.items():
-        if weights:  # Check if the list is not empty
-            if flat_weights := [
-                w for sublist in weights for w in sublist if isinstance(w, (int, float))
-            ]:
-                mean = statistics.mean(flat_weights)
-                stdev = statistics.stdev(flat_weights)
-                for i, sublist in enumerate(weights):
-                    for j, weight in enumerate(sublist):
-                        if isinstance(weight, (int, float)):
-                            z_score = (weight - mean) / stdev
-                            if abs(z_score) > threshold:
-                                if validator not in outliers:
-                                    outliers[validator] = []
-                                outliers[validator].append((i, j, weight))
-    return outliers
-
-
-def identify_boosted_miners(data, outliers):
-    boosted_miners = {}
-    for validator, outlier_weights in outliers.items():
-        for i, j, weight in outlier_weights:
-            miner = data[validator][i][0]  # Assuming miner ID is at index 0
-            if miner not in boosted_miners:
-                boosted_miners[miner] = []
-            boosted_miners[miner].append((validator, weight))
-    return boosted_miners
+from validation.weight_engine import detect_outliers, identify_boosted_miners
 
 
 def punish_weight_deviation(data_path):
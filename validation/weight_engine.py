@@ -0,0 +1,150 @@
+import statistics
+
+import numpy as np
+
+# |z| this close to the threshold is re-checked with the statistics module,
+# float rounding in the vectorized mean/stdev must not flip an outlier.
+TIE_TOLERANCE = 1e-9
+
+
+class FlatWeights:
+    """Every numeric entry of every validator's weight lists in flat arrays.
+
+    Validator v owns values[indptr[v]:indptr[v + 1]]; sub_index and position
+    give each value's [i][j] place in the original nested list. Like the
+    original comprehension, miner uids count as values too.
+    """
+
+    def __init__(self, validators, indptr, values, sub_index, position):
+        self.validators = validators
+        self.indptr = indptr
+        self.values = values
+        self.sub_index = sub_index
+        self.position = position
+
+    @property
+    def counts(self):
+        return np.diff(self.indptr)
+
+    def rows(self):
+        return np.repeat(np.arange(len(self.validators)), self.counts)
+
+
+def _flatten_validator(weights):
+    try:
+        array = np.array(weights)
+    except (ValueError, OverflowError):
+        array = None
+    # Uniform [[uid, weight], ...] lists convert in one go; anything ragged,
+    # huge or non numeric takes the per-item path with the original filter.
+    if array is not None and array.ndim == 2 and array.dtype.kind in "biuf":
+        rows, width = array.shape
+        return (
+            array.astype(np.float64).ravel(),
+            np.repeat(np.arange(rows), width),
+            np.tile(np.arange(width), rows),
+        )
+    values, sub_index, position = [], [], []
+    for i, sublist in enumerate(weights):
+        for j, weight in enumerate(sublist):
+            if isinstance(weight, (int, float)):
+                values.append(weight)
+                sub_index.append(i)
+                position.append(j)
+    return (
+        np.array(values, dtype=np.float64),
+        np.array(sub_index, dtype=np.int64),
+        np.array(position, dtype=np.int64),
+    )
+
+
+def flatten_weights(data):
+    validators, parts = [], []
+    for validator, weights in data.items():
+        if not weights:
+            continue
+        part = _flatten_validator(weights)
+        if len(part[0]):
+            validators.append(validator)
+            parts.append(part)
+    counts = [len(part[0]) for part in parts]
+    indptr = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    if not parts:
+        empty = np.array([], dtype=np.int64)
+        return FlatWeights(validators, indptr, empty.astype(np.float64), empty, empty)
+    values, sub_index, position = (np.concatenate(column) for column in zip(*parts))
+    return FlatWeights(validators, indptr, values, sub_index, position)
+
+
+def validator_stats(flat):
+    """Per-validator mean and sample stdev (ddof=1), nan for a single value."""
+    counts = flat.counts
+    starts = flat.indptr[:-1]
+    mean = np.add.reduceat(flat.values, starts) / counts
+    deviation = flat.values - np.repeat(mean, counts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stdev = np.sqrt(np.add.reduceat(deviation**2, starts) / (counts - 1))
+    stdev[counts < 2] = np.nan
+    return mean, stdev, deviation
+
+
+def _exact_flat(data, validator):
+    return [
+        w for sublist in data[validator] for w in sublist if isinstance(w, (int, float))
+    ]
+
+
+def outlier_mask(data, flat, threshold=2):
+    if not flat.validators:
+        return np.zeros(0, dtype=bool)
+    mean, stdev, deviation = validator_stats(flat)
+    # A validator without spread (one value, or all equal) has no outliers.
+    stdev[~(stdev > 0)] = np.inf
+    rows = flat.rows()
+    z_score = deviation / stdev[rows]
+    mask = np.abs(z_score) > threshold
+    near = np.flatnonzero(np.abs(np.abs(z_score) - threshold) <= TIE_TOLERANCE)
+    exact = {}
+    for index in near.tolist():
+        validator = flat.validators[rows[index]]
+        if validator not in exact:
+            flat_weights = _exact_flat(data, validator)
+            exact[validator] = (
+                statistics.mean(flat_weights),
+                statistics.stdev(flat_weights),
+            )
+        exact_mean, exact_stdev = exact[validator]
+        i, j = flat.sub_index[index], flat.position[index]
+        weight = data[validator][i][j]
+        mask[index] = bool(exact_stdev) and (
+            abs((weight - exact_mean) / exact_stdev) > threshold
+        )
+    return mask
+
+
+def detect_outliers(data, threshold=2):
+    """Same {validator: [(i, j, weight)]} as the original per-item loop.
+
+    Unlike the original, a validator whose weights have no spread yields no
+    outliers instead of raising StatisticsError or ZeroDivisionError.
+    """
+    flat = flatten_weights(data)
+    mask = outlier_mask(data, flat, threshold)
+    outliers = {}
+    hits = np.flatnonzero(mask)
+    rows = flat.rows()[hits].tolist()
+    for row, i, j in zip(
+        rows, flat.sub_index[hits].tolist(), flat.position[hits].tolist()
+    ):
+        validator = flat.validators[row]
+        outliers.setdefault(validator, []).append((i, j, data[validator][i][j]))
+    return outliers
+
+
+def identify_boosted_miners(data, outliers):
+    boosted_miners = {}
+    for validator, outlier_weights in outliers.items():
+        for i, _, weight in outlier_weights:
+            miner = data[validator][i][0]  # Assuming miner ID is at index 0
+            boosted_miners.setdefault(miner, []).append((validator, weight))
+    return boosted_miners
@@ -0,0 +1,258 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from generate.query_map_store import query_map_store
+from generate.snapshot import write_atomic
+
+WEIGHT_MATRIX_DIR = os.getenv("WEIGHT_MATRIX_DIR", "query_maps/weight_matrix")
+# Older snapshots stay on disk so processes still mapping them keep working.
+WEIGHT_MATRIX_KEEP = int(os.getenv("WEIGHT_MATRIX_KEEP", 2))
+
+ARRAYS = ("indptr", "indices", "data")
+# Directory names of published snapshots, "<mtime ns>-<size>".
+KEY_PATTERN = re.compile(r"\d+-\d+")
+
+
+def _weight_pairs(weights):
+    """[[miner uid, weight], ...] as an (n, 2) int64 array.
+
+    Uniform numeric lists convert in one go. Ragged or mixed lists keep only
+    the entries whose first two items are numbers, extra items are ignored.
+    """
+    try:
+        array = np.array(weights or [])
+    except (ValueError, OverflowError):
+        array = None
+    if array is not None and array.size == 0:
+        return np.empty((0, 2), np.int64)
+    if (
+        array is not None
+        and array.ndim == 2
+        and array.shape[1] >= 2
+        and array.dtype.kind in "biuf"
+    ):
+        return array[:, :2].astype(np.int64)
+    pairs = [
+        pair[:2]
+        for pair in weights
+        if isinstance(pair, (list, tuple))
+        and len(pair) >= 2
+        and all(isinstance(value, (int, float)) for value in pair[:2])
+    ]
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def _key_order(key):
+    mtime, size = key.split("-")
+    return int(mtime), int(size)
+
+
+class WeightMatrix:
+    """Validator x miner weights of one query_map_weights snapshot in CSR form.
+
+    Row r is validator validators[r]: its miner uids are
+    indices[indptr[r]:indptr[r + 1]] (sorted) and data holds the weights.
+    The arrays can be memory-mapped from disk, so processes analysing the
+    same snapshot share one copy through the page cache.
+    """
+
+    def __init__(self, validators, indptr, indices, data, miners=None):
+        self.validators = list(validators)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.miners = (
+            miners
+            if miners is not None
+            else (int(indices.max()) + 1 if len(indices) else 0)
+        )
+        self._rows = {validator: row for row, validator in enumerate(self.validators)}
+        self._columns = None
+
+    @classmethod
+    def from_query_map(cls, query_map):
+        """Build from {validator: [[miner uid, weight], ...]} as stored on disk."""
+        validators, lengths, pairs = [], [], []
+        for validator, weights in query_map.items():
+            row = _weight_pairs(weights)
+            row = row[np.argsort(row[:, 0], kind="stable")]
+            validators.append(validator)
+            lengths.append(len(row))
+            pairs.append(row)
+        indptr = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), np.int64)
+        return cls(
+            validators,
+            indptr,
+            np.ascontiguousarray(pairs[:, 0]),
+            np.ascontiguousarray(pairs[:, 1]),
+        )
+
+    @property
+    def shape(self):
+        return len(self.validators), self.miners
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def row_counts(self):
+        return np.diff(self.indptr)
+
+    def row(self, validator):
+        """(miner uids, weights) views of one validator's weights."""
+        row = self._rows[validator]
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def _column_index(self):
+        # CSC permutation, built on first column access.
+        if self._columns is None:
+            order = np.argsort(self.indices, kind="stable")
+            counts = np.bincount(self.indices, minlength=self.miners)
+            colptr = np.concatenate(([0], np.cumsum(counts)))
+            rows = np.repeat(np.arange(len(self.validators)), self.row_counts())
+            self._columns = colptr, rows[order], order
+        return self._columns
+
+    def column(self, miner):
+        """(validator rows, weights) of everyone who weighted miner."""
+        colptr, rows, order = self._column_index()
+        if not 0 <= miner < self.miners:
+            return rows[:0], self.data[:0]
+        selected = order[colptr[miner] : colptr[miner + 1]]
+        return rows[colptr[miner] : colptr[miner + 1]], self.data[selected]
+
+    def incoming(self):
+        """Total weight each miner receives, indexed by uid."""
+        totals = np.zeros(self.miners, dtype=np.int64)
+        np.add.at(totals, self.indices, self.data)
+        return totals
+
+    def validator_stats(self):
+        """Per-row (count, mean, sample stdev), nan where a row is too short."""
+        counts = self.row_counts()
+        rows = np.repeat(np.arange(len(self.validators)), counts)
+        values = self.data.astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(rows, values, len(counts)) / counts
+            deviation = values - mean[rows]
+            stdev = np.sqrt(np.bincount(rows, deviation**2, len(counts)) / (counts - 1))
+        stdev[counts < 2] = np.nan
+        return counts, mean, stdev
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        meta = {"validators": self.validators, "miners": self.miners}
+        write_atomic(directory / "meta.json", json.dumps(meta).encode())
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        directory = Path(directory)
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        arrays = [
+            np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAYS
+        ]
+        return cls(meta["validators"], *arrays, miners=meta["miners"])
+
+
+class WeightMatrixStore:
+    """One WeightMatrix per weights snapshot, shared through disk.
+
+    A snapshot is keyed by its file's "<mtime ns>-<size>", so refreshes that
+    only changed other query maps reuse the matrix. <dir>/<key>/ holds the
+    arrays and <dir>/current names the newest key. The first process to see
+    a new snapshot builds it under an exclusive lock on <dir>/.lock, the
+    rest wait for it and memory-map the saved arrays. A published key is
+    never rebuilt in place; only keys older than the WEIGHT_MATRIX_KEEP
+    newest are removed.
+    """
+
+    def __init__(self, directory=WEIGHT_MATRIX_DIR, store=query_map_store):
+        self.directory = Path(directory)
+        self.store = store
+        self._matrix = None
+        self._key = None
+        self._lock = threading.Lock()
+
+    def key(self):
+        """Key of the weights snapshot currently on disk."""
+        return "{}-{}".format(*self.store.signature("weights"))
+
+    def _current(self):
+        try:
+            return (self.directory / "current").read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _exclusive(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _build(self, key, target):
+        matrix = WeightMatrix.from_query_map(self.store.get("weights"))
+        tmp = self.directory / f"{key}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        matrix.save(tmp)
+        os.replace(tmp, target)
+        current = self._current()
+        if current is None or _key_order(current) < _key_order(key):
+            write_atomic(self.directory / "current", key.encode())
+
+    def _prune(self):
+        # Runs under the exclusive lock: no build is in progress, so leftover
+        # .tmp directories belong to builders that died. Readers still mapping
+        # a removed snapshot keep their open files.
+        published = []
+        for path in self.directory.iterdir():
+            if not path.is_dir():
+                continue
+            if ".tmp" in path.name:
+                shutil.rmtree(path, ignore_errors=True)
+            elif KEY_PATTERN.fullmatch(path.name):
+                published.append(path)
+        published.sort(key=lambda path: _key_order(path.name), reverse=True)
+        for path in published[WEIGHT_MATRIX_KEEP:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _load(self, key):
+        target = self.directory / key
+        if target.is_dir():
+            return WeightMatrix.load(target)
+        with self._exclusive():
+            # Another process may have published it while this one waited.
+            if not target.is_dir():
+                self._build(key, target)
+            matrix = WeightMatrix.load(target)
+            self._prune()
+        return matrix
+
+    def get(self):
+        key = self.key()
+        if self._key == key:
+            return self._matrix
+        with self._lock:
+            if self._key != key:
+                self._matrix = self._load(key)
+                self._key = key
+            return self._matrix
+
+
+weight_matrix_store = WeightMatrixStore()
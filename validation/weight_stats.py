@@ -0,0 +1,245 @@
+import math
+import os
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+from validation.weight_matrix import weight_matrix_store
+
+# Snapshots a miner's boosts are remembered for, and how many of them must
+# show a boost before the miner is flagged.
+WEIGHT_STATS_WINDOW = int(os.getenv("WEIGHT_STATS_WINDOW", 12))
+WEIGHT_STATS_MIN_HITS = int(os.getenv("WEIGHT_STATS_MIN_HITS", 3))
+# Robust z-score (distance from the median in scaled MADs) counted as a boost.
+WEIGHT_STATS_THRESHOLD = float(os.getenv("WEIGHT_STATS_THRESHOLD", 3.5))
+# Weights sampled per validator for the approximate median and MAD.
+WEIGHT_STATS_RESERVOIR = int(os.getenv("WEIGHT_STATS_RESERVOIR", 512))
+
+# MAD * MAD_SCALE estimates the stdev of normally distributed weights.
+MAD_SCALE = 1.4826
+
+
+class RunningStats:
+    """Welford mean and variance, merged a batch at a time."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        total = self.count + len(values)
+        delta = batch_mean - self.mean
+        self.mean += delta * len(values) / total
+        self.m2 += batch_m2 + delta**2 * self.count * len(values) / total
+        self.count = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+class Reservoir:
+    """Uniform sample of at most size values seen so far (algorithm R)."""
+
+    def __init__(self, size=WEIGHT_STATS_RESERVOIR, rng=None):
+        self.size = size
+        self.seen = 0
+        self.values = np.empty(0, dtype=np.float64)
+        self.rng = rng or np.random.default_rng()
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        room = self.size - len(self.values)
+        if room > 0:
+            self.values = np.concatenate((self.values, values[:room]))
+            self.seen += len(values[:room])
+            values = values[room:]
+        if not len(values):
+            return
+        # Item k of the stream replaces a random slot with probability
+        # size / (k + 1); later items win on the same slot, as in sequence.
+        positions = self.seen + np.arange(len(values))
+        slots = self.rng.integers(0, positions + 1)
+        keep = slots < self.size
+        self.values[slots[keep]] = values[keep]
+        self.seen += len(values)
+
+    def median_mad(self):
+        if not len(self.values):
+            return math.nan, math.nan
+        median = float(np.median(self.values))
+        return median, float(np.median(np.abs(self.values - median)))
+
+
+class ValidatorStats:
+    def __init__(self, reservoir_size, rng):
+        self.running = RunningStats()
+        self.reservoir = Reservoir(reservoir_size, rng)
+
+    def push(self, weights):
+        self.running.push(weights)
+        self.reservoir.push(weights)
+
+    def center_scale(self):
+        """(median, robust spread), falling back to the stdev when MAD is 0."""
+        median, mad = self.reservoir.median_mad()
+        scale = mad * MAD_SCALE
+        if not scale > 0:
+            scale = self.running.stdev
+        return median, scale
+
+
+class MinerStats:
+    """Welford mean and variance of every miner's incoming weight, by uid."""
+
+    def __init__(self):
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0, dtype=np.float64)
+        self.m2 = np.zeros(0, dtype=np.float64)
+
+    def push(self, incoming):
+        grow = len(incoming) - len(self.count)
+        if grow > 0:
+            self.count = np.concatenate((self.count, np.zeros(grow, np.int64)))
+            self.mean = np.concatenate((self.mean, np.zeros(grow)))
+            self.m2 = np.concatenate((self.m2, np.zeros(grow)))
+        values = np.zeros(len(self.count))
+        values[: len(incoming)] = incoming
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+
+    def stdev(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+
+class WeightDeviationMonitor:
+    """Boosted-miner detection that follows weights across snapshots.
+
+    Each observed WeightMatrix is scored against every validator's running
+    median and MAD, drawn from a bounded reservoir of its past weights, and
+    then folded into the running statistics. A miner is flagged once at
+    least min_hits of the last window snapshots had a validator weighting it
+    more than threshold robust z-scores above that validator's median. Only
+    the per-snapshot boosts inside the window are kept, so memory stays
+    bounded however long the monitor runs.
+    """
+
+    def __init__(
+        self,
+        window=WEIGHT_STATS_WINDOW,
+        min_hits=WEIGHT_STATS_MIN_HITS,
+        threshold=WEIGHT_STATS_THRESHOLD,
+        reservoir_size=WEIGHT_STATS_RESERVOIR,
+        seed=None,
+    ):
+        self.window = window
+        self.min_hits = min_hits
+        self.threshold = threshold
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+        self.validators = {}
+        self.miners = MinerStats()
+        self.snapshots = 0
+        self.snapshot_key = None
+        self._boosts = deque()
+        self._hits = Counter()
+        self._lock = threading.Lock()
+
+    def _validator(self, validator):
+        stats = self.validators.get(validator)
+        if stats is None:
+            stats = self.validators[validator] = ValidatorStats(
+                self.reservoir_size, self.rng
+            )
+        return stats
+
+    def _score(self, matrix):
+        """{miner: [(validator, weight, robust z)]} boosted in this snapshot."""
+        boosts = {}
+        for validator in matrix.validators:
+            miners, weights = matrix.row(validator)
+            stats = self.validators.get(validator)
+            if stats is None or not len(weights):
+                continue
+            median, scale = stats.center_scale()
+            # No spread yet (too few weights, or all identical): nothing stands out.
+            if not scale > 0:
+                continue
+            z_scores = (weights - median) / scale
+            for index in np.flatnonzero(z_scores > self.threshold).tolist():
+                boosts.setdefault(int(miners[index]), []).append(
+                    (validator, int(weights[index]), float(z_scores[index]))
+                )
+        return boosts
+
+    def _observe(self, matrix):
+        boosts = self._score(matrix)
+        for validator in matrix.validators:
+            self._validator(validator).push(matrix.row(validator)[1])
+        self.miners.push(matrix.incoming())
+        self.snapshots += 1
+
+        self._boosts.append(set(boosts))
+        self._hits.update(boosts.keys())
+        if len(self._boosts) > self.window:
+            self._hits.subtract(self._boosts.popleft())
+            self._hits += Counter()
+        return boosts
+
+    def observe(self, matrix):
+        """Score one snapshot, fold it into the statistics and return its boosts."""
+        with self._lock:
+            return self._observe(matrix)
+
+    def observe_store(self, store=weight_matrix_store):
+        """Observe the store's matrix once per weights snapshot.
+
+        Keyed on the weights file itself: refreshes that only changed other
+        query maps must not count the same weights as another snapshot.
+        """
+        with self._lock:
+            key = store.key()
+            if key == self.snapshot_key:
+                return {}
+            boosts = self._observe(store.get())
+            self.snapshot_key = key
+            return boosts
+
+    def boosted_miners(self):
+        """{miner: snapshots in the window with a boost}, for flagged miners."""
+        with self._lock:
+            return {
+                miner: hits
+                for miner, hits in self._hits.items()
+                if hits >= self.min_hits
+            }
+
+    def validator_summary(self, validator):
+        stats = self.validators[validator]
+        median, mad = stats.reservoir.median_mad()
+        return {
+            "count": stats.running.count,
+            "mean": stats.running.mean,
+            "stdev": stats.running.stdev,
+            "median": median,
+            "mad": mad,
+        }
+
+
+weight_monitor = WeightDeviationMonitor()
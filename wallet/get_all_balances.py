@@ -1,5 +1,3 @@
-from communex.client import CommuneClient
-from communex._common import get_node_url
 from communex.compat.key import Keypair, Ss58Address
 from pathlib import Path
 import time
@@ -7,12 +5,13 @@ import json
 import os
 import io
 
-comx = CommuneClient(get_node_url())
+from generate.query_map_store import query_map_store
+from generate.get_all_balance import keyring_columns
+from generate.stake_totals import STAKEFROM_SOURCE, STAKETO_SOURCE
 
 
 def get_balance_map():
-    with open("query_maps/balances.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get("balances")
 
 
 def get_balance(ss58key):
@@ -22,8 +21,7 @@ def get_balance(ss58key):
 
 
 def get_staketo_map():
-    with open("querymaps/staketo.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get(STAKETO_SOURCE)
 
 
 def get_staketo(ss58key):
@@ -37,8 +35,7 @@ def get_staketo(ss58key):
 
 
 def get_stakefrom_map():
-    with open("querymaps/stakefrom.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    return query_map_store.get(STAKEFROM_SOURCE)
 
 
 def get_stakefrom(ss58key):
@@ -84,23 +81,16 @@ def get_balances(key_path):
         key_data = json.load(f)
     key_dict = {}
     lines = []
-    balance_querymap = get_balance_map()
-    staketo_querymap = get_staketo_map()
-    stakefrom_querymap = get_stakefrom_map()
     try:
-        for ss58key, value in key_data.items():
-            balance = 0
-            staketo = 0
-            stakefrom = 0
-            total = 0
-
-            if ss58key in balance_querymap.keys():
-                balance = round((get_balance(ss58key) / 1_000_000_000), 2) or 0
-            if ss58key in staketo_querymap.keys():
-                staketo = round((get_staketo(ss58key) / 1_000_000_000), 2) or 0
-            if ss58key in stakefrom_querymap.keys():
-                stakefrom = round((get_stakefrom(ss58key) / 1_000_000_000), 2) or 0
-            total = round((balance + staketo), 2) or 0
+        columns = {
+            field: column.tolist()
+            for field, column in keyring_columns(key_data).items()
+        }
+        for i, (ss58key, value) in enumerate(key_data.items()):
+            balance = columns["balance"][i] or 0
+            staketo = columns["stake"][i] or 0
+            stakefrom = columns["stake_from"][i] or 0
+            total = columns["total"][i] or 0
             if total > 5000 or stakefrom > 5000:
                 print(balance)
                 print(staketo)
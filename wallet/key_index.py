@@ -0,0 +1,97 @@
+import json
+import threading
+from pathlib import Path
+
+
+def parse_key_file(key_path):
+    """Read a report key file into {address: {"key", "name"}}."""
+    key_dict = {}
+    with open(key_path, "r", encoding=("utf-8")) as f:
+        data = json.loads(f.read())
+        for keydata in data.values():
+            if "key" not in keydata:
+                continue
+            if "name" not in keydata:
+                continue
+            key = keydata["key"]
+            key_dict[key] = {"key": key, "name": keydata["name"]}
+    return key_dict
+
+
+class KeyEntry:
+    """One parsed key file with its lookup indexes."""
+
+    def __init__(self, signature, key_dict):
+        self.signature = signature
+        self.key_dict = key_dict
+        self.names = {key: value["name"] for key, value in key_dict.items()}
+        self.addresses = {value["name"]: key for key, value in key_dict.items()}
+        self.address_set = frozenset(key_dict)
+
+
+class KeyIndex:
+    """Process-wide cache of the report key files in main_reports/.
+
+    Each file is parsed once and served from memory until its mtime or size
+    changes. Returned dicts are shared between callers and must not be
+    modified.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._unions = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, path):
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def entry(self, key_path):
+        path = Path(key_path)
+        signature = self._signature(path)
+        cached = self._entries.get(path)
+        if cached is not None and cached.signature == signature:
+            return cached
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached.signature == signature:
+                return cached
+            entry = KeyEntry(signature, parse_key_file(path))
+            self._entries[path] = entry
+            return entry
+
+    def key_dict(self, key_path):
+        return self.entry(key_path).key_dict
+
+    def names(self, key_path):
+        """address -> name"""
+        return self.entry(key_path).names
+
+    def addresses(self, key_path):
+        """name -> address"""
+        return self.entry(key_path).addresses
+
+    def union(self, key_paths):
+        """Every address in any of key_paths, missing files are skipped."""
+        entries = {
+            Path(path): self.entry(path) for path in key_paths if Path(path).exists()
+        }
+        signature = tuple((path, entry.signature) for path, entry in entries.items())
+        cached = self._unions.get(signature)
+        if cached is not None:
+            return cached
+        union = frozenset().union(*(entry.address_set for entry in entries.values()))
+        with self._lock:
+            self._unions = {signature: union}
+        return union
+
+    def invalidate(self, key_path=None):
+        with self._lock:
+            if key_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(key_path), None)
+            self._unions = {}
+
+
+key_index = KeyIndex()